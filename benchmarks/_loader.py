@@ -0,0 +1,16 @@
+"""Import modules of the integration without running its Home Assistant dependent `__init__`."""
+import importlib
+import os
+import sys
+import types
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+PACKAGE_DIR = os.path.join(ROOT, 'custom_components', 'tianqi')
+
+
+def load(name):
+    if 'tianqi' not in sys.modules:
+        pkg = types.ModuleType('tianqi')
+        pkg.__path__ = [PACKAGE_DIR]
+        sys.modules['tianqi'] = pkg
+    return importlib.import_module(f'tianqi.{name}')
@@ -0,0 +1,198 @@
+"""Full update cycles of N simulated areas against the local mock upstream.
+
+Every area gets its own TianqiClient, as a config entry would, and each cycle updates every endpoint of
+every client. Needs Home Assistant and aiohttp installed:
+
+    python benchmarks/bench_cycle.py --areas 1 10 100 500 --cycles 5 --latency 20 --trace-alloc
+    python benchmarks/bench_cycle.py --areas 100 --json > before.json
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import resource
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from collections import defaultdict
+
+from homeassistant.config_entries import ConfigEntries
+from homeassistant.core import HomeAssistant
+
+from server import MockUpstream
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'custom_components'))
+
+from tianqi import DOMAIN, TianqiClient  # noqa: E402
+from tianqi.endpoints import ENDPOINTS  # noqa: E402
+
+FIRST_AREA = 101300000
+
+
+def rss_mb():
+    try:
+        with open('/proc/self/statm') as fp:
+            return int(fp.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1048576
+    except (OSError, ValueError):
+        # peak instead of current where /proc is missing, KB on Linux but bytes on macOS
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / 1048576 if sys.platform == 'darwin' else peak / 1024
+
+
+def parse_totals(clients):
+    """Parses and their milliseconds per endpoint, summed over the stats of every client."""
+    totals = defaultdict(lambda: (0, 0.0))
+    for client in clients:
+        for name, ent in client.stats.endpoints.items():
+            count, total = totals[name]
+            totals[name] = (count + ent.timings['parse'].count, total + ent.timings['parse'].total)
+    return totals
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * pct / 100))]
+
+
+async def make_hass(config_dir):
+    try:
+        hass = HomeAssistant(config_dir)
+    except TypeError:
+        # before 2024.3 the config dir was set afterwards
+        hass = HomeAssistant()
+        hass.config.config_dir = config_dir
+    hass.config_entries = ConfigEntries(hass, {})
+    return hass
+
+
+async def run(areas, cycles, server: MockUpstream, concurrency, conditional, trace_alloc, multi_area=False):
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = await make_hass(config_dir)
+        base = {
+            'domain': 'weather.invalid',
+            'url_template': server.url_template,
+            'coalesce_ttl': 0,
+            'conditional_requests': conditional,
+            'http_limit_per_host': concurrency,
+        }
+        server.not_modified = 0
+        rss_before = rss_mb()
+        start = time.perf_counter()
+        area_ids = [str(FIRST_AREA + i) for i in range(areas)]
+        if multi_area:
+            clients = await TianqiClient.clients_from_config(hass, {**base, 'entry_id': 'bench', 'area_ids': area_ids})
+        else:
+            clients = await asyncio.gather(*[
+                TianqiClient.from_config(hass, {**base, 'entry_id': f'bench{i}', 'area_id': area_id})
+                for i, area_id in enumerate(area_ids)
+            ])
+        setup = time.perf_counter() - start
+
+        latency = defaultdict(list)  # endpoint: milliseconds
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def update(client, spec):
+            async with semaphore:
+                begin = time.perf_counter()
+                await client.update_endpoint(spec)
+                latency[spec.name].append((time.perf_counter() - begin) * 1000)
+
+        # the first cycle fills caches and sessions and is not measured
+        await asyncio.gather(*[update(c, s) for c in clients for s in ENDPOINTS.values()])
+        latency.clear()
+        parse_before = parse_totals(clients)
+        if trace_alloc:
+            tracemalloc.start()
+        start = time.perf_counter()
+        for _ in range(cycles):
+            await asyncio.gather(*[update(c, s) for c in clients for s in ENDPOINTS.values()])
+        elapsed = time.perf_counter() - start
+        allocated = None
+        if trace_alloc:
+            current, peak = tracemalloc.get_traced_memory()
+            tracemalloc.stop()
+            allocated = {'retained_kb': round(current / 1024, 1), 'peak_kb': round(peak / 1024, 1)}
+
+        endpoints = {}
+        parse_after = parse_totals(clients)
+        for name, values in latency.items():
+            count, total = parse_before[name]
+            parsed = parse_after[name][0] - count
+            endpoints[name] = {
+                'requests': len(values),
+                'p50_ms': round(percentile(values, 50), 2),
+                'p99_ms': round(percentile(values, 99), 2),
+                'parse_ms': round((parse_after[name][1] - total) / parsed, 3) if parsed else None,
+            }
+        report = {
+            'areas': areas,
+            'multi_area': multi_area,
+            'cycles': cycles,
+            'setup_s': round(setup, 3),
+            'cycle_s': round(elapsed / cycles, 3),
+            'updates_per_s': round(areas * len(ENDPOINTS) * cycles / elapsed, 1),
+            'not_modified': server.not_modified,
+            'rss_mb': round(rss_mb(), 1),
+            'rss_growth_mb': round(rss_mb() - rss_before, 1),
+            'allocations': allocated,
+            'endpoints': endpoints,
+        }
+        for client in clients:
+            await client.unload()
+        await hass.data[DOMAIN]['sessions'].close()
+        hass.data.pop(DOMAIN, None)
+        return report
+
+
+def print_report(report):
+    alloc = report['allocations'] or {}
+    print(
+        f'{report["areas"]} areas{" (one entry)" if report["multi_area"] else ""}: setup {report["setup_s"]}s, cycle {report["cycle_s"]}s, '
+        f'{report["updates_per_s"]} updates/s, rss {report["rss_mb"]} MB (+{report["rss_growth_mb"]}), '
+        f'304 {report["not_modified"]}' + (f', alloc peak {alloc["peak_kb"]} KB' if alloc else ''),
+    )
+    print(f'  {"endpoint":10} {"requests":>8} {"p50 ms":>8} {"p99 ms":>8} {"parse ms":>8}')
+    for name, ent in report['endpoints'].items():
+        parse = '-' if ent['parse_ms'] is None else f'{ent["parse_ms"]:.3f}'
+        print(f'  {name:10} {ent["requests"]:8} {ent["p50_ms"]:8.2f} {ent["p99_ms"]:8.2f} {parse:>8}')
+
+
+async def main(args):
+    server = await MockUpstream(args.latency, args.jitter, etag=args.conditional).start()
+    reports = []
+    try:
+        for areas in args.areas:
+            report = await run(
+                areas, args.cycles, server, args.concurrency, args.conditional, args.trace_alloc, args.multi_area,
+            )
+            reports.append(report)
+            if not args.json:
+                print_report(report)
+    finally:
+        await server.stop()
+    if args.json:
+        print(json.dumps(reports, indent=2))
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--areas', type=int, nargs='+', default=[1, 10, 100])
+    parser.add_argument('--cycles', type=int, default=3)
+    parser.add_argument('--concurrency', type=int, default=64, help='updates in flight at once')
+    parser.add_argument('--latency', type=float, default=0, help='milliseconds the mock server waits')
+    parser.add_argument('--jitter', type=float, default=0)
+    parser.add_argument('--conditional', action='store_true', help='send conditional requests, served 304')
+    parser.add_argument('--trace-alloc', action='store_true', help='trace allocations, slows the run down')
+    parser.add_argument('--multi-area', action='store_true', help='one multi-area entry instead of one entry per area')
+    parser.add_argument('--json', action='store_true', help='print the reports as JSON for comparing releases')
+    parser.add_argument('-v', '--verbose', action='store_true')
+    cli = parser.parse_args()
+    logging.basicConfig(level=logging.DEBUG if cli.verbose else logging.WARNING)
+    if not all(1 <= areas <= 500 for areas in cli.areas):
+        parser.error('areas must be between 1 and 500')
+    asyncio.run(main(cli))
@@ -0,0 +1,74 @@
+"""Compare the streaming variable extractor with the previous full-text regex path.
+
+    python benchmarks/bench_extractor.py
+"""
+import json
+import re
+import time
+import tracemalloc
+
+import pages
+from _loader import load
+
+extractor = load('extractor')
+
+REGEX_PATHS = {
+    'summary': [r'dataSK\s*=\s*({.*?})\s*;', r'dataZS\s*=\s*({.*?})\s*;'],
+    'alarms': [r'var alarmDZ\w*\s*=\s*({.*})'],
+    'dailies': [r'fc\s*=\s*({.*})'],
+    'hourlies': [r'fc180\s*=\s*({.*})'],
+    'observe': [r'observe24h_data\s*=\s*({.*?})\s*;'],
+}
+SPECS = {
+    'summary': extractor.JsVars({'dataSK': r'dataSK\s*=\s*', 'dataZS': r'dataZS\s*=\s*'}),
+    'alarms': extractor.JsVars({'alarms': r'var alarmDZ\w*\s*=\s*'}),
+    'dailies': extractor.JsVars({'fc': r'fc\s*=\s*'}),
+    'hourlies': extractor.JsVars({'fc180': r'fc180\s*=\s*'}),
+    'observe': extractor.JsVars({'observe24h_data': r'observe24h_data\s*=\s*'}),
+}
+PAGES = {
+    'summary': pages.summary_page(),
+    'alarms': pages.alarms_page(),
+    'dailies': pages.dailies_page(),
+    'hourlies': pages.hourlies_page(),
+    'observe': pages.observe_page(),
+}
+
+
+def regex_path(body: bytes, patterns):
+    txt = body.decode()
+    return [json.loads(m.group(1)) for p in patterns if (m := re.search(p, txt, re.DOTALL))]
+
+
+def stream_path(body: bytes, spec, size=extractor.CHUNK_SIZE):
+    # same work as JsVars.extract_stream, minus the event loop
+    scanner = spec.scanner()
+    for i in range(0, len(body), size):
+        if scanner.feed(body[i:i + size]):
+            break
+    return scanner
+
+
+def measure(func, *args, number=200):
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    start = time.perf_counter()
+    for _ in range(number):
+        func(*args)
+    return (time.perf_counter() - start) / number * 1000, peak / 1024
+
+
+def main():
+    print(f'{"endpoint":10} {"size KB":>8} {"regex ms":>9} {"regex KB":>9} {"stream ms":>10} {"stream KB":>10} {"read KB":>8}')
+    for name, body in PAGES.items():
+        assert regex_path(body, REGEX_PATHS[name]) == list(SPECS[name].extract(body).values()), name
+        rms, rkb = measure(regex_path, body, REGEX_PATHS[name])
+        sms, skb = measure(stream_path, body, SPECS[name])
+        read = stream_path(body, SPECS[name]).bytes_read / 1024
+        print(f'{name:10} {len(body) / 1024:8.1f} {rms:9.3f} {rkb:9.1f} {sms:10.3f} {skb:10.1f} {read:8.1f}')
+
+
+if __name__ == '__main__':
+    main()
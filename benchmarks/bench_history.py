@@ -0,0 +1,69 @@
+"""Merging observations, rain over a range and the rolling aggregates, hour dicts rescanned versus the ObserveHistory ring.
+
+    python benchmarks/bench_history.py
+"""
+import time
+
+from _loader import load
+
+records = load('records')
+history = load('history')
+
+HOURS = 720  # a month of observations
+PAGE = 25  # hours on the observe page
+
+
+def hours(count, start=0):
+    return [records.ObserveHour(3600 * i, 20.0, 60.0, rain=(i % 7) * 0.1) for i in range(start, start + count)]
+
+
+def rain_dict(observes: dict, start, end):
+    return sum(hour.rain for tim, hour in observes.items() if start <= tim < end)
+
+
+def aggregates_dict(observes: dict):
+    """What the template and statistics sensors recomputed on every new hour."""
+    end = max(observes) + 3600
+    data = {f'rain_{hours}h': rain_dict(observes, end - hours * 3600, end) for hours in history.RAIN_WINDOWS}
+    day = [hour for tim, hour in observes.items() if tim >= end - history.ROLLING_HOURS * 3600]
+    for col, (name, stats) in history.ObserveHistory.ROLLING.items():
+        values = [getattr(hour, col) for hour in day]
+        funcs = {'min': min, 'max': max, 'mean': lambda v: sum(v) / len(v)}
+        for stat in stats:
+            data[f'{name}_{stat}_{history.ROLLING_HOURS}h'] = funcs[stat](values)
+    return data
+
+
+def measure(func, number=2000):
+    begin = time.perf_counter()
+    for _ in range(number):
+        func()
+    return (time.perf_counter() - begin) / number * 1e6
+
+
+def main():
+    observes = {hour.time: hour for hour in hours(HOURS)}
+    ring = history.ObserveHistory(HOURS)
+    ring.merge(observes.values())
+    end = 3600 * HOURS
+    print(f'{"query":16} {"dict us":>8} {"ring us":>8}')
+    for span in (3, 24, 168):
+        start = end - 3600 * span
+        assert abs(rain_dict(observes, start, end) - ring.rain_between(start, end)) < 1e-6
+        print(
+            f'{f"rain {span}h":16} {measure(lambda: rain_dict(observes, start, end)):8.2f} '
+            f'{measure(lambda: ring.rain_between(start, end)):8.2f}'
+        )
+    assert aggregates_dict(observes).keys() == ring.aggregates().keys()
+    print(f'{"aggregates":16} {measure(lambda: aggregates_dict(observes)):8.2f} {measure(ring.aggregates):8.2f}')
+    page = hours(PAGE, HOURS - PAGE + 1)
+
+    def merge_dict():
+        merged = dict(observes)
+        merged.update((hour.time, hour) for hour in page)
+
+    print(f'{"merge page":16} {measure(merge_dict, 200):8.2f} {measure(lambda: ring.merge(page), 200):8.2f}')
+
+
+if __name__ == '__main__':
+    main()
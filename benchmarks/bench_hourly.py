@@ -0,0 +1,87 @@
+"""Memory and per-tick cost of the hourly forecast, raw `jh` rows versus the columnar HourlySeries.
+
+    python benchmarks/bench_hourly.py
+"""
+import json
+import time
+import tracemalloc
+
+from datetime import datetime, timedelta
+
+import pages
+from _loader import load
+
+records = load('records')
+
+NOW = datetime(2026, 10, 18, 9, 20)
+ROWS = 49
+
+
+def raw_rows():
+    page = pages.hourlies_page()
+    return json.loads(page[page.index(b'{'):])['jh']
+
+
+def tick_rows(rows):
+    """What async_forecast_hourly did per row before."""
+    lst = []
+    for item in rows:
+        if len(lst) > ROWS - 1:
+            break
+        try:
+            day = datetime.strptime(item.get('jf', ''), '%Y%m%d%H%M')
+            tim = NOW.replace(month=day.month, day=day.day, hour=day.hour, minute=0)
+        except (TypeError, ValueError):
+            continue
+        if NOW - tim > timedelta(hours=1.5):
+            continue
+        row = {'datetime': tim}
+        for key, col in records.HourlySeries.COLUMNS.items():
+            try:
+                row[key] = float(item.get(col))
+            except (TypeError, ValueError):
+                pass
+        lst.append(row)
+    return lst
+
+
+def tick_series(series):
+    lst = []
+    start = series.index(records.wall_seconds(NOW - timedelta(hours=1.5)))
+    for sec, code, *values in series.rows(start, start + ROWS):
+        row = {'datetime': records.wall_datetime(sec)}
+        for key, val in zip(records.HourlySeries.COLUMNS, values):
+            if val is not None:
+                row[key] = val
+        lst.append(row)
+    return lst
+
+
+def size(factory):
+    tracemalloc.start()
+    obj = factory()
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return obj, current / 1024
+
+
+def measure(func, arg, number=2000):
+    start = time.perf_counter()
+    for _ in range(number):
+        func(arg)
+    return (time.perf_counter() - start) / number * 1000
+
+
+def main():
+    rows, rows_kb = size(raw_rows)
+    series, series_kb = size(lambda: records.HourlySeries.from_rows(rows))
+    parse = measure(records.HourlySeries.from_rows, rows, 200)
+    assert len(tick_rows(rows)) == len(tick_series(series))
+    print(f'{"store":8} {"KB":>8} {"tick ms":>8}')
+    print(f'{"rows":8} {rows_kb:8.1f} {measure(tick_rows, rows):8.3f}')
+    print(f'{"series":8} {series_kb:8.1f} {measure(tick_series, series):8.3f}')
+    print(f'parse once per fetch: {parse:.3f} ms')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,72 @@
+"""Decode cost of the upstream payloads per JSON backend, per poll cycle and per area-hour.
+
+    python benchmarks/bench_json.py
+"""
+import json
+import time
+
+import pages
+from _loader import load
+
+endpoints = load('endpoints')
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+BACKENDS = {'json': json.loads}
+if orjson:
+    BACKENDS['orjson'] = orjson.loads
+if ujson:
+    BACKENDS['ujson'] = ujson.loads
+
+PAGES = {
+    'summary': pages.summary_page(),
+    'alarms': pages.alarms_page(),
+    'dailies': pages.dailies_page(),
+    'hourlies': pages.hourlies_page(),
+    'observe': pages.observe_page(),
+}
+
+
+def payloads():
+    """Raw object bytes exactly as the extractor hands them to the codec."""
+    for name, spec in endpoints.ENDPOINTS.items():
+        if spec.variables is None:
+            yield name, [pages.minutely_json()]
+            continue
+        scanner = spec.variables.scanner()
+        scanner.feed(PAGES[name])
+        yield name, [bytes(raw) for raw in scanner.raw.values()]
+
+
+def measure(loads, blobs, number=300):
+    start = time.perf_counter()
+    for _ in range(number):
+        for blob in blobs:
+            loads(blob)
+    return (time.perf_counter() - start) / number * 1000
+
+
+def main():
+    names = list(BACKENDS)
+    print(f'{"endpoint":10} {"KB":>6} {"per hour":>8} ' + ' '.join(f'{n + " ms":>10}' for n in names))
+    totals = dict.fromkeys(names, 0.0)
+    for name, blobs in payloads():
+        per_hour = 3600 / endpoints.ENDPOINTS[name].interval.total_seconds()
+        cost = {n: measure(loads, blobs) for n, loads in BACKENDS.items()}
+        for n in names:
+            totals[n] += cost[n] * per_hour
+        size = sum(map(len, blobs)) / 1024
+        print(f'{name:10} {size:6.1f} {per_hour:8.0f} ' + ' '.join(f'{cost[n]:10.3f}' for n in names))
+    print(f'{"area-hour":10} {"":6} {"":8} ' + ' '.join(f'{totals[n]:10.2f}' for n in names))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+"""Resident memory of the parsed station, observations and daily forecast per area, dicts versus the records.
+
+    python benchmarks/bench_records.py
+"""
+import gc
+import json
+import tracemalloc
+
+from datetime import datetime, timedelta
+
+import pages
+from _loader import load
+
+records = load('records')
+endpoints = load('endpoints')
+
+AREAS = 100
+
+
+def observe_dicts(values):
+    """What parse_observe kept per hour before, the raw row plus derived keys."""
+    rdt = values['observe24h_data']['od']
+    stm = datetime.strptime(rdt['od0'], '%Y%m%d%H%M')
+    dat = {}
+    for v in reversed(rdt['od2']):
+        tim = stm.replace(hour=int(v['od21']))
+        if tim < stm:
+            tim += timedelta(days=1)
+        stm = tim
+        dat[tim.strftime('%Y%m%d%H%M')] = {
+            **v,
+            'aqi': v.get('od28'),
+            'temp': float(v.get('od22')),
+            'humi': float(v.get('od27')),
+            'rain': float(v.get('od26') or 0),
+            'wind': v.get('od24'),
+            'wind_level': float(v.get('od25') or 0),
+            'wind_angel': float(v.get('od23') or 0),
+        }
+    return dat
+
+
+def sources():
+    station = json.loads(pages.station_json())
+    observe = endpoints.ENDPOINTS['observe'].variables.extract(pages.observe_page())
+    dailies = endpoints.ENDPOINTS['dailies'].variables.extract(pages.dailies_page())
+    return {**station['location'], **station['data']['station']}, observe, dailies['fc']['f']
+
+
+def as_dicts(station, observe, dailies):
+    return dict(station), observe_dicts(observe), [dict(v) for v in dailies]
+
+
+def as_records(station, observe, dailies):
+    result = {}
+    endpoints.parse_observe(result, observe)
+    return records.StationInfo(station), result['observe'], records.DailyRow.load_rows(dailies)
+
+
+def size(build):
+    gc.collect()
+    tracemalloc.start()
+    kept = [build() for _ in range(AREAS)]
+    current = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return current / AREAS / 1024
+
+
+def main():
+    raw = json.dumps(sources(), ensure_ascii=False)
+    print(f'{"store":8} {"KB/area":>8}')
+    # every area parses its own pages, only what the parse keeps stays resident
+    print(f'{"dicts":8} {size(lambda: as_dicts(*json.loads(raw))):8.1f}')
+    print(f'{"records":8} {size(lambda: as_records(*json.loads(raw))):8.1f}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,133 @@
+"""Upstream pages served by the mock server: recorded ones from `fixtures/` when present, synthetic ones otherwise.
+
+Record the real pages of one area (needs network, the domain is the one configured in the integration):
+
+    python benchmarks/fixtures.py --record example.com --area 101020100
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import time
+
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional
+
+import pages
+
+FIXTURE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+FIXTURE_AREA = '101020100'  # area id the fixtures were built or recorded for
+AREA_ID = re.compile(r'\d{9}')
+
+
+@dataclass(frozen=True)
+class Fixture:
+    name: str
+    node: str
+    path: str  # request path below the node, {area_id} is filled in
+    file: str
+    content_type: str
+    synthetic: Callable[[], bytes]
+    params: Optional[dict] = None  # query of the recorded request
+
+    def url_path(self, area_id):
+        return self.path.format(area_id=area_id)
+
+
+def search_json():
+    refs = [
+        {'ref': f'{FIXTURE_AREA}~shanghai~上海~Shanghai~上海~Shanghai~021~200000~shanghai~上海'},
+        {'ref': '101020200~shanghai~闵行~Minhang~闵行~Minhang~021~201100~shanghai~上海'},
+    ]
+    return ('(%s)' % json.dumps(refs, ensure_ascii=False)).encode()
+
+
+FIXTURES: Dict[str, Fixture] = {
+    fix.name: fix
+    for fix in [
+        Fixture('summary', 'd1', 'weather_index/{area_id}.html', 'weather_index.html', 'text/html', pages.summary_page),
+        Fixture('alarms', 'd1', 'dingzhi/{area_id}.html', 'dingzhi.html', 'text/html', pages.alarms_page),
+        Fixture('dailies', 'd1', 'weixinfc/{area_id}.html', 'weixinfc.html', 'text/html', pages.dailies_page),
+        Fixture('hourlies', 'd1', 'wap_180h/{area_id}.html', 'wap_180h.html', 'text/html', pages.hourlies_page),
+        Fixture('observe', 'www', 'weather/{area_id}.shtml', 'weather.shtml', 'text/html', pages.observe_page),
+        Fixture(
+            'minutely', 'mpf', 'mpf_v3/webgis/minute', 'minute.json', 'application/json', pages.minutely_json,
+            params={'lat': 31.2, 'lon': 121.4},
+        ),
+        Fixture(
+            'station', 'd7', 'geong/v1/api', 'stationinfo.json', 'application/json', pages.station_json,
+            params={'params': json.dumps({'method': 'stationinfo', 'areaid': FIXTURE_AREA})},
+        ),
+        Fixture('search', 'toy1', 'search', 'search.json', 'application/json', search_json, params={'cityname': '上海'}),
+    ]
+}
+
+
+def match(node, path) -> Optional[Fixture]:
+    """Fixture of a request path, whatever area it asks for."""
+    for fix in FIXTURES.values():
+        if fix.node == node and AREA_ID.sub(FIXTURE_AREA, path) == fix.url_path(FIXTURE_AREA):
+            return fix
+    return None
+
+
+def load(seed=0) -> Dict[str, bytes]:
+    """Body of every fixture for FIXTURE_AREA, the same on every run."""
+    random.seed(seed)
+    bodies = {}
+    for name, fix in FIXTURES.items():
+        path = os.path.join(FIXTURE_DIR, fix.file)
+        if os.path.exists(path):
+            with open(path, 'rb') as fp:
+                bodies[name] = fp.read()
+        else:
+            bodies[name] = fix.synthetic()
+    return bodies
+
+
+def for_area(body: bytes, area_id) -> bytes:
+    if not area_id or area_id == FIXTURE_AREA:
+        return body
+    return body.replace(FIXTURE_AREA.encode(), area_id.encode())
+
+
+async def record(domain, area_id=FIXTURE_AREA):
+    import aiohttp
+
+    os.makedirs(FIXTURE_DIR, exist_ok=True)
+    headers = {
+        'Referer': f'https://m.{domain}/',
+        'User-Agent': 'Mozilla/5.0 (iPhone; CPU iPhone OS 17_0 like Mac OS X) AppleWebKit/605.1.15 Mobile/15E148',
+    }
+    async with aiohttp.ClientSession(headers=headers) as session:
+        for fix in FIXTURES.values():
+            url = f'https://{fix.node}.{domain}/{fix.url_path(area_id)}'
+            params = {k: str(v).replace(FIXTURE_AREA, area_id) for k, v in (fix.params or {}).items()}
+            params['_'] = int(time.time() * 1000)
+            async with session.get(url, params=params, allow_redirects=False, ssl=False) as res:
+                body = await res.read()
+            if res.status != 200 or not body:
+                print(f'{fix.name:10} {res.status} skipped')
+                continue
+            with open(os.path.join(FIXTURE_DIR, fix.file), 'wb') as fp:
+                fp.write(body.replace(area_id.encode(), FIXTURE_AREA.encode()))
+            print(f'{fix.name:10} {res.status} {len(body) / 1024:8.1f} KB -> {fix.file}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--record', metavar='DOMAIN', help='fetch the real pages of DOMAIN into fixtures/')
+    parser.add_argument('--area', default=FIXTURE_AREA)
+    args = parser.parse_args()
+    if args.record:
+        asyncio.run(record(args.record, args.area))
+        return
+    for name, body in load().items():
+        source = 'recorded' if os.path.exists(os.path.join(FIXTURE_DIR, FIXTURES[name].file)) else 'synthetic'
+        print(f'{name:10} {source:9} {len(body) / 1024:8.1f} KB')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+"""Synthetic pages shaped like the upstream ones, for benchmarks that run without network."""
+import json
+import random
+
+from datetime import datetime, timedelta
+
+PADDING = '<div class="pad">%s</div>\n' % ('天气' * 40)
+
+
+def _html(script: str, padding=200):
+    head = '<!DOCTYPE html><html><head><meta charset="utf-8"><title>天气</title></head><body>\n'
+    return (head + PADDING * padding + f'<script>\n{script}\n</script>\n' + PADDING * padding + '</body></html>').encode()
+
+
+def data_sk(area_id='101020100'):
+    return {
+        'nameen': 'shanghai', 'cityname': '上海', 'city': area_id, 'temp': '26.3', 'tempf': '79.3',
+        'WD': '东南风', 'wde': 'SE', 'WS': '2级', 'wse': '9km/h', 'SD': '72%', 'sd': '72%', 'qy': '1008',
+        'njd': '16km', 'time': '14:30', 'rain': '0', 'rain24h': '0.3', 'aqi': '42', 'aqi_pm25': '28',
+        'weather': '多云', 'weathere': 'Cloudy', 'weathercode': 'd01', 'limitnumber': '', 'date': '10月18日(星期日)',
+    }
+
+
+def data_zs():
+    zs = {'date': '2026101808'}
+    for idx, key in enumerate(['ac', 'ag', 'cl', 'co', 'ct', 'dy', 'fs', 'gj', 'gm', 'ls', 'pj', 'pp', 'tr', 'uv', 'xc', 'ys', 'yd']):
+        zs[f'{key}_name'] = f'指数{idx}'
+        zs[f'{key}_hint'] = '适宜'
+        zs[f'{key}_des_s'] = '天气较好，适宜户外活动，注意防晒补水。' * 2
+    return {'zs': zs, 'cityname': '上海'}
+
+
+def summary_page(area_id='101020100'):
+    script = 'var dataSK = %s;\nvar dataZS = %s;' % (
+        json.dumps(data_sk(area_id), ensure_ascii=False),
+        json.dumps(data_zs(), ensure_ascii=False),
+    )
+    return _html(script, padding=20)
+
+
+def alarms_page(count=2):
+    alarms = [
+        {
+            'w1': '上海市', 'w2': '', 'w4': '07', 'w5': '高温', 'w6': '02', 'w7': '橙色', 'w8': '2026-10-18 10:00',
+            'w9': '上海中心气象台发布高温橙色预警，预计今天最高气温将升至37℃以上，请注意防暑降温。' * 3,
+            'w13': '上海市气象台发布高温橙色预警', 'w16': f'1010201002026101810000{i}',
+        }
+        for i in range(count)
+    ]
+    return ('var alarmDZ101020100 = %s' % json.dumps({'w': alarms}, ensure_ascii=False)).encode()
+
+
+def dailies_page(days=15):
+    now = datetime(2026, 10, 18)
+    rows = []
+    for i in range(days):
+        day = now + timedelta(days=i)
+        rows.append({
+            'fa': '%02d' % random.choice([0, 1, 2, 3, 7, 8]), 'fb': '01', 'fc': str(random.randint(22, 30)),
+            'fd': str(random.randint(14, 21)), 'fe': '东南风', 'ff': '东风', 'fg': '<3级', 'fh': '<3级',
+            'fi': f'{day.month}/{day.day}', 'fj': '周日', 'fn': str(random.randint(40, 90)),
+        })
+    return ('var fc = %s' % json.dumps({'f': rows}, ensure_ascii=False)).encode()
+
+
+def hourlies_page(hours=180):
+    now = datetime(2026, 10, 18, 8)
+    rows = []
+    for i in range(hours):
+        tim = now + timedelta(hours=i)
+        rows.append({
+            'ja': '%02d' % random.choice([0, 1, 2, 3, 7]), 'jb': str(random.randint(15, 30)),
+            'jc': str(random.randint(0, 7)), 'jd': str(random.randint(0, 7)), 'je': str(random.randint(40, 95)),
+            'jf': tim.strftime('%Y%m%d%H%M'), 'jg': str(random.randint(3, 20)), 'jh': '0', 'ji': '0',
+            'jj': str(random.randint(1000, 1020)),
+        })
+    return ('var fc180 = %s' % json.dumps({'jh': rows}, ensure_ascii=False)).encode()
+
+
+def observe_page(hours=25):
+    now = datetime(2026, 10, 18, 14)
+    rows = []
+    for i in range(hours):
+        tim = now - timedelta(hours=i)
+        rows.append({
+            'od21': '%02d' % tim.hour, 'od22': '%.1f' % random.uniform(15, 30), 'od23': str(random.randint(0, 359)),
+            'od24': '东南风', 'od25': str(random.randint(0, 4)), 'od26': '%.1f' % random.choice([0, 0, 0, 0.2, 1.5]),
+            'od27': str(random.randint(40, 95)), 'od28': str(random.randint(20, 90)),
+        })
+    script = 'var observe24h_data = %s;' % json.dumps({
+        'od': {'od0': (now - timedelta(hours=hours - 1)).strftime('%Y%m%d%H%M'), 'od1': '上海', 'od2': rows},
+    }, ensure_ascii=False)
+    return _html(script, padding=400)
+
+
+def minutely_json():
+    return json.dumps({
+        'msg': '未来两小时不会下雨，放心出门吧',
+        'times': [f'{h:02d}:{m:02d}' for h in range(14, 16) for m in range(0, 60, 5)],
+        'values': [0.0] * 24,
+    }, ensure_ascii=False).encode()
+
+
+def station_json(area_id='101020100'):
+    return json.dumps({
+        'data': {'station': {'areaid': area_id, 'namecn': '上海', 'nameen': 'shanghai', 'lat': 31.2, 'lng': 121.4}},
+        'location': {'lat': 31.2, 'lng': 121.4},
+    }, ensure_ascii=False).encode()
@@ -0,0 +1,104 @@
+"""Local stand-in for the upstream hosts, serving the fixtures under /{node}/{path} for any area id.
+
+    python benchmarks/server.py --port 8080 --latency 20
+
+Point a client at it with the config `url_template: http://127.0.0.1:8080/{node}/`.
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+
+from collections import Counter
+
+from aiohttp import web
+
+import fixtures
+
+
+class MockUpstream:
+    def __init__(self, latency=0.0, jitter=0.0, etag=True, seed=0):
+        self.latency = latency / 1000  # milliseconds in, seconds kept
+        self.jitter = jitter / 1000
+        self.etag = etag
+        self.bodies = fixtures.load(seed)
+        self.hits = Counter()  # fixture name: requests
+        self.not_modified = 0
+        self.runner = None
+        self.port = None
+
+    @property
+    def url_template(self):
+        return f'http://127.0.0.1:{self.port}/{{node}}/'
+
+    def app(self) -> web.Application:
+        app = web.Application()
+        app.router.add_get('/{node}/{path:.*}', self.handle)
+        return app
+
+    async def handle(self, request: web.Request) -> web.Response:
+        fix = fixtures.match(request.match_info['node'], request.match_info['path'])
+        if not fix:
+            raise web.HTTPNotFound()
+        self.hits[fix.name] += 1
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+        area_id = self.area_id(request)
+        body = fixtures.for_area(self.bodies[fix.name], area_id)
+        headers = {}
+        if self.etag:
+            tag = '"%s"' % hashlib.md5(body).hexdigest()[:16]
+            headers['ETag'] = tag
+            if request.headers.get('If-None-Match') == tag:
+                self.not_modified += 1
+                return web.Response(status=304, headers=headers)
+        return web.Response(body=body, headers=headers, content_type=fix.content_type, charset='utf-8')
+
+    @staticmethod
+    def area_id(request: web.Request):
+        if match := fixtures.AREA_ID.search(request.match_info['path']):
+            return match.group(0)
+        if params := request.query.get('params'):
+            try:
+                return json.loads(params).get('areaid')
+            except ValueError:
+                return None
+        return None
+
+    async def start(self, host='127.0.0.1', port=0):
+        self.runner = web.AppRunner(self.app(), access_log=None)
+        await self.runner.setup()
+        await web.TCPSite(self.runner, host, port).start()
+        self.port = self.runner.addresses[0][1]
+        return self
+
+    async def stop(self):
+        if self.runner:
+            await self.runner.cleanup()
+            self.runner = None
+
+
+async def serve(port, latency, jitter):
+    server = await MockUpstream(latency, jitter).start(port=port)
+    print(f'Serving fixtures, url_template: {server.url_template}')
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await server.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--latency', type=float, default=0, help='milliseconds added to every response')
+    parser.add_argument('--jitter', type=float, default=0, help='up to this many more milliseconds')
+    args = parser.parse_args()
+    try:
+        asyncio.run(serve(args.port, args.latency, args.jitter))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
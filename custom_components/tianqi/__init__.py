@@ -2,15 +2,16 @@ import logging
 import aiohttp
 import asyncio
 import time
-import json
 import base64
+import hashlib
+import re
 import voluptuous as vol
 
-from datetime import datetime, timedelta
-from functools import wraps
-from typing import Callable, Set, Type, Tuple
+from functools import partial, wraps
+from typing import Callable, List, Set, Type, Tuple
 
 from homeassistant.const import (
+    EntityCategory,
     Platform,
     CONF_DOMAIN,
     EVENT_HOMEASSISTANT_STOP,
@@ -18,17 +19,44 @@ from homeassistant.const import (
     UnitOfLength,
     UnitOfPressure,
     UnitOfTemperature,
+    UnitOfTime,
     CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
 )
 from homeassistant.core import HomeAssistant, State, ServiceCall, SupportsResponse, callback
 from homeassistant.helpers.entity import Entity
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.helpers import aiohttp_client
 from homeassistant.exceptions import IntegrationError
 from homeassistant.helpers.device_registry import DeviceInfo, DeviceEntryType
-from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
 
 from .converters.base import *
+from .session import SessionPool
+from .cache import EndpointResult, GroupCache, ResponseCache, PERSIST_INTERVAL, result_ok
+from . import codec
+from .extractor import JsVars, CHUNK_SIZE
+from .endpoints import ENDPOINTS, EndpointSpec
+from .coalesce import RequestCoalescer, DEFAULT_TTL as DEFAULT_COALESCE_TTL
+from .adaptive import AdaptiveInterval, storm_active, DEFAULT_MIN_SCALE, DEFAULT_MAX_SCALE
+from .breaker import CircuitBreaker, CircuitOpenError, CLOSED, HALF_OPEN, OPEN
+from .retry import (
+    DEFAULT_POLICY as DEFAULT_RETRY,
+    AbandonedError,
+    INTERVAL_SHARE,
+    MissingPayloadError,
+    RETRY_EXCEPTIONS,
+    RETRY_STATUS,
+    RetryEngine,
+    RetryPolicy,
+    raise_for_retry,
+)
+from .history import ObserveHistory, DEFAULT_OBSERVE_HOURS, RAIN_WINDOWS, ROLLING_HOURS
+from .records import DailyRow, HourlySeries, StationInfo, wall_datetime
+from .stats import RequestStats, trace_config
+from .scheduler import (
+    PollCoordinator,
+    PollScheduler,
+    DEFAULT_CONCURRENCY as DEFAULT_POLL_CONCURRENCY,
+    DEFAULT_RATE_PER_HOST as DEFAULT_POLL_RATE,
+)
 
 
 DOMAIN = 'tianqi'
@@ -41,6 +69,17 @@ SUPPORTED_PLATFORMS = [
 ]
 HTTP_REFERER = base64.b64decode('aHR0cHM6Ly9tLndlYXRoZXIuY29tLmNuLw==').decode()
 USER_AGENT = 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_1) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/138.0.0.0 Safari/537.36'
+DEFAULT_STARTUP_TIMEOUT = 10
+DEFAULT_STATION_CONCURRENCY = 8
+DRAIN_LIMIT = 65536
+MISSING = object()
+
+
+def parse_area_ids(value) -> List[str]:
+    """Area ids of a multi-area entry, from a list or a comma or space separated string."""
+    if isinstance(value, str):
+        value = re.split(r'[\s,，;；]+', value)
+    return list(dict.fromkeys(f'{v}'.strip() for v in value or [] if f'{v}'.strip()))
 
 
 async def async_setup(hass: HomeAssistant, hass_config):
@@ -48,11 +87,12 @@ async def async_setup(hass: HomeAssistant, hass_config):
     if not (domain := config.get(CONF_DOMAIN)):
         return True
 
-    client = await TianqiClient.from_config(hass, config)
+    clients = await TianqiClient.clients_from_config(hass, config)
+    client = clients[0]
     hass.data[DOMAIN]['latest_domain'] = domain
 
     async def get_station(call: ServiceCall):
-        return await client.get_station(**call.data)
+        return (await client.get_station(**call.data)).data
     hass.services.async_register(
         DOMAIN, 'get_station', get_station,
         schema=vol.Schema({}, extra=vol.ALLOW_EXTRA),
@@ -107,6 +147,23 @@ async def async_setup(hass: HomeAssistant, hass_config):
         supports_response=SupportsResponse.OPTIONAL,
     )
 
+    async def get_stats(call: ServiceCall):
+        # every client, of the yaml config and of the entries, keyed as in the diagnostics
+        entry_id, area_id = call.data.get('entry_id'), call.data.get('area_id')
+        return {
+            key: cln.stats_report()
+            for key, cln in hass.data[DOMAIN]['clients'].items()
+            if (not entry_id or cln.entry_id == entry_id) and (not area_id or cln.configured_area_id == area_id)
+        }
+    hass.services.async_register(
+        DOMAIN, 'get_stats', get_stats,
+        schema=vol.Schema({
+            vol.Optional('entry_id'): vol.Coerce(str),
+            vol.Optional('area_id'): vol.Coerce(str),
+        }),
+        supports_response=SupportsResponse.ONLY,
+    )
+
     if 'entry_id' not in config:
         await asyncio.gather(
             *[
@@ -114,7 +171,7 @@ async def async_setup(hass: HomeAssistant, hass_config):
                 for domain in SUPPORTED_PLATFORMS
             ]
         )
-        await client.init()
+        await asyncio.gather(*[client.init() for client in clients])
 
     return True
 
@@ -132,13 +189,14 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry):
 
     entry.async_on_unload(entry.add_update_listener(async_update_options))
 
-    if client := await TianqiClient.from_config(hass, entry):
+    clients = await TianqiClient.clients_from_config(hass, entry)
+    for client in clients:
         entry.async_on_unload(
             hass.bus.async_listen_once(EVENT_HOMEASSISTANT_STOP, client.unload)
         )
 
     await hass.config_entries.async_forward_entry_setups(entry, SUPPORTED_PLATFORMS)
-    await client.init()
+    await asyncio.gather(*[client.init() for client in clients])
     return ret
 
 async def async_update_options(hass: HomeAssistant, entry: ConfigEntry):
@@ -146,20 +204,23 @@ async def async_update_options(hass: HomeAssistant, entry: ConfigEntry):
     await hass.config_entries.async_reload(entry.entry_id)
 
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry):
-    client = await TianqiClient.from_config(hass, entry)
-    if isinstance(client, TianqiClient):
+    clients = hass.data.get(DOMAIN, {}).get('clients', {})
+    for client in [c for c in clients.values() if c.entry_id == entry.entry_id]:
         await client.unload()
-        hass.data[DOMAIN]['clients'].pop(entry.entry_id)
-        _LOGGER.info('Unload client: %s', [entry.entry_id, client.station])
+        clients.pop(client.key, None)
+        _LOGGER.info('Unload client: %s', [client.key, client.station])
+    hass.data.get(DOMAIN, {}).get('caches', {}).pop(entry.entry_id, None)
 
     await hass.config_entries.async_unload_platforms(entry, SUPPORTED_PLATFORMS)
     return True
 
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry):
+    await ResponseCache(hass, entry.entry_id).async_remove()
+
 async def async_add_setuper(hass: HomeAssistant, config, domain, setuper):
-    client = await TianqiClient.from_config(hass, config)
-    if not client:
-        return
-    if domain not in client.setups:
+    for client in await TianqiClient.clients_from_config(hass, config):
+        if domain in client.setups:
+            continue
         client.setups[domain] = setuper
         if domain == Platform.WEATHER:
             setuper(client)
@@ -168,43 +229,35 @@ async def async_add_setuper(hass: HomeAssistant, config, domain, setuper):
 
 
 def aiohttp_retry(
-    max_retries: int = 10,
-    backoff_factor: float = 2.0,
+    max_retries: int = DEFAULT_RETRY.retries,
+    backoff_factor: float = DEFAULT_RETRY.base,
     retry_on_status: Optional[Set[int]] = None,
-    exceptions: Tuple[Type[BaseException], ...] = (aiohttp.ClientError, asyncio.TimeoutError),
+    exceptions: Tuple[Type[BaseException], ...] = RETRY_EXCEPTIONS,
+    node: Optional[str] = None,
 ):
     """
-    aiohttp 请求自动重试装饰器。
+    aiohttp 请求自动重试装饰器，用于客户端方法，经由客户端共享的 RetryEngine 重试。
     :param max_retries: 最大重试次数（不包括第一次请求）
-    :param backoff_factor: 退避因子（秒）。用于计算重试前的等待时间。
-    :param retry_on_status: 一个包含需要重试的 HTTP 状态码的集合。如果为 None，则默认重试 5xx 错误
+    :param backoff_factor: 退避因子（秒）。等待时间在 0 到 backoff_factor * 2**attempt 之间随机
+    :param retry_on_status: 一个包含需要重试的 HTTP 状态码的集合。如果为 None，则默认重试 429 和 5xx 错误
     :param exceptions: 一个需要捕获并触发重试的异常元组
+    :param node: 请求的子域名，同一主机共享重试预算和熔断器
     """
-    if retry_on_status is None:
-        retry_on_status = {500, 502, 503, 504}
+    policy = RetryPolicy(
+        retries=max_retries,
+        base=backoff_factor,
+        retry_status=frozenset(retry_on_status or RETRY_STATUS),
+        exceptions=exceptions,
+    )
 
     def decorator(func: Callable):
         @wraps(func)
-        async def wrapper(*args, **kwargs):
-            last_exception = None
-            for attempt in range(max_retries + 1):
-                try:
-                    return await func(*args, **kwargs)
-                except exceptions as exc:
-                    _LOGGER.warning("Error while fetching data from %s", func.__name__, exc_info=True)
-                    last_exception = exc
-                    if attempt == max_retries:
-                        break
-                    is_retryable_status = isinstance(exc, aiohttp.ClientConnectorDNSError)
-                    if isinstance(exc, aiohttp.ClientResponseError):
-                        if exc.status in retry_on_status:
-                            is_retryable_status = True
-                    if not is_retryable_status:
-                        break
-                    delay = backoff_factor * (2 ** attempt)
-                    await asyncio.sleep(delay)
-            if last_exception:
-                raise last_exception
+        async def wrapper(self, *args, **kwargs):
+            return await self.retry.run(
+                partial(func, self, *args, **kwargs),
+                host=f'{node}.{self.domain}' if node else self.domain,
+                policy=policy, name=func.__name__,
+            )
         return wrapper
     return decorator
 
@@ -217,103 +270,102 @@ class TianqiClient:
         self.config = config or {}
         self.entry_id = self.config.get('entry_id') or 'yaml'
         self.entry = hass.config_entries.async_get_entry(self.entry_id)
+        # clients of a multi-area entry share it, one per area
+        self.multi_area = bool(self.config.get('area_ids'))
+        self.key = f'{self.entry_id}-{self.config.get("area_id")}' if self.multi_area else self.entry_id
         self.data = {}
         self.setups = {}
         self.entities = {}
         self.station: Optional[StationInfo] = None
 
-        self.http = aiohttp_client.async_create_clientsession(
+        hass.data.setdefault(DOMAIN, {})
+        self.sessions: SessionPool = hass.data[DOMAIN].setdefault('sessions', SessionPool())
+        self.retry: RetryEngine = hass.data[DOMAIN].setdefault('retry', RetryEngine())
+        self.stats = RequestStats()  # requests of this client only, the session is shared
+        self._trace_config = trace_config()  # built once, used if this client is the one opening the session
+        self.stale = set()  # endpoints served from the last result while their host is down
+        self.history = ObserveHistory(int(self.config.get('observe_hours') or DEFAULT_OBSERVE_HOURS))
+        self._http = None
+        self._unloaded = False
+        if self.multi_area:
+            group = hass.data[DOMAIN].setdefault('caches', {}).get(self.entry_id)
+            if not group:
+                group = hass.data[DOMAIN]['caches'][self.entry_id] = GroupCache(hass, self.entry_id)
+            self.cache = group.area(self.config.get('area_id'))
+        else:
+            self.cache = ResponseCache(hass, self.entry_id)
+        self.scheduler: PollScheduler = hass.data[DOMAIN].setdefault('scheduler', PollScheduler(
             hass,
-            timeout=aiohttp.ClientTimeout(
-                total=60,
-                connect=30,
-            ),
-            auto_cleanup=False,
+            concurrency=self.config.get('poll_concurrency', DEFAULT_POLL_CONCURRENCY),
+            rate_per_host=self.config.get('poll_rate_per_host', DEFAULT_POLL_RATE),
+        ))
+        self.coalescer: RequestCoalescer = hass.data[DOMAIN].setdefault(
+            'coalescer', RequestCoalescer(ttl=float(self.config.get('coalesce_ttl', DEFAULT_COALESCE_TTL))),
         )
-        self.http._default_headers = {
-            'Referer': HTTP_REFERER,
-            'User-Agent': USER_AGENT,
-        }
 
         self.coordinators = [
-            DataUpdateCoordinator(
+            PollCoordinator(
                 hass, _LOGGER,
-                name='alarms',
+                name=spec.name,
+                node=spec.node,
                 config_entry=self.entry,
-                update_method=self.update_alarms,
-                update_interval=timedelta(minutes=5),
-            ),
-            DataUpdateCoordinator(
-                hass, _LOGGER,
-                name='summary',
-                config_entry=self.entry,
-                update_method=self.update_summary_and_entities,
-                update_interval=timedelta(seconds=60),
-            ),
-            DataUpdateCoordinator(
-                hass, _LOGGER,
-                name='dailies',
-                config_entry=self.entry,
-                update_method=self.update_dailies,
-                update_interval=timedelta(minutes=60),
-            ),
-            DataUpdateCoordinator(
-                hass, _LOGGER,
-                name='observe',
-                config_entry=self.entry,
-                update_method=self.update_observe,
-                update_interval=timedelta(minutes=30),
-            ),
-            DataUpdateCoordinator(
-                hass, _LOGGER,
-                name='hourlies',
-                config_entry=self.entry,
-                update_method=self.update_hourlies,
-                update_interval=timedelta(minutes=30),
-            ),
-            DataUpdateCoordinator(
-                hass, _LOGGER,
-                name='minutely',
-                config_entry=self.entry,
-                update_method=self.update_minutely,
-                update_interval=timedelta(minutes=5),
-            ),
+                update_method=partial(self.poll_endpoint, spec),
+                poll_interval=spec.interval,
+            )
+            for spec in ENDPOINTS.values()
         ]
+        self.intervals = {}  # endpoint: AdaptiveInterval
+        if self.config.get('adaptive_polling'):
+            min_scale = float(self.config.get('poll_min_scale', DEFAULT_MIN_SCALE))
+            max_scale = float(self.config.get('poll_max_scale', DEFAULT_MAX_SCALE))
+            for spec in ENDPOINTS.values():
+                self.intervals[spec.name] = AdaptiveInterval(spec.interval, min_scale, max_scale)
+        self.storm = False
         self._remove_listeners = []
+        self._consumers = {}  # consumer key: endpoints it reads
+        self._jobs = {}  # endpoint: remover of its scheduler job
+        self.started = False
+        self.startup_timing = {}
+        self._applied = {}  # endpoint: last applied result
+        self._last_payload = {}  # attr: last pushed value
+        self.deferred = set()
 
         self.converters = {}
+        self._children = {}  # parent attr: child attrs
+        self._subscribers = {}  # attr: {entity key: entity}
+        self._payload_subscribers = {}  # attr: {entity key: entity}, for entities showing the whole payload
         self.add_converters(
-            NumberSensorConv('precipitation', prop='rain').with_option({
+            NumberSensorConv('precipitation', prop='rain', source='summary').with_option({
                 'device_class': 'precipitation',
                 'state_class': 'measurement',
                 'unit_of_measurement': UnitOfLength.MILLIMETERS,
             }),
-            NumberSensorConv('precipitation_24h', prop='rain24h').with_option({
+            NumberSensorConv('precipitation_24h', prop='rain24h', source='summary').with_option({
                 'device_class': 'precipitation',
                 'state_class': 'measurement',
                 'unit_of_measurement': UnitOfLength.MILLIMETERS,
             }),
-            NumberSensorConv('temperature', prop='temp').with_option({
+            NumberSensorConv('temperature', prop='temp', source='summary').with_option({
                 'device_class': 'temperature',
                 'state_class': 'measurement',
                 'unit_of_measurement': UnitOfTemperature.CELSIUS,
             }),
-            NumberSensorConv('humidity', prop='sd', unit='%').with_option({
+            NumberSensorConv('humidity', prop='sd', unit='%', source='summary').with_option({
                 'device_class': 'humidity',
                 'state_class': 'measurement',
                 'unit_of_measurement': PERCENTAGE,
             }),
-            NumberSensorConv('pm25', prop='aqi_pm25').with_option({
+            NumberSensorConv('pm25', prop='aqi_pm25', source='summary').with_option({
                 'device_class': 'pm25',
                 'state_class': 'measurement',
                 'unit_of_measurement': CONCENTRATION_MICROGRAMS_PER_CUBIC_METER,
             }),
-            NumberSensorConv('atmospheric_pressure', prop='qy').with_option({
+            NumberSensorConv('atmospheric_pressure', prop='qy', source='summary').with_option({
                 'device_class': 'atmospheric_pressure',
                 'state_class': 'measurement',
                 'unit_of_measurement': UnitOfPressure.HPA,
             }),
-            NumberSensorConv('visibility', prop='njd', unit='km').with_option({
+            NumberSensorConv('visibility', prop='njd', unit='km', source='summary').with_option({
                 'device_class': 'distance',
                 'state_class': 'measurement',
                 'unit_of_measurement': UnitOfLength.KILOMETERS,
@@ -321,34 +373,113 @@ class TianqiClient:
             WindSpeedSensorConv(),
             AlarmsBinarySensorConv(),
             ForecastMinutelySensorConv(),
-            SensorConv('limit_number', prop='limitnumber', enabled=False).with_option({
+            SensorConv('limit_number', prop='limitnumber', enabled=False, source='summary').with_option({
                 'icon': 'mdi:counter',
             }),
+            *[
+                NumberSensorConv(f'rain_{hours}h', enabled=False, source='observe').with_option({
+                    'device_class': 'precipitation',
+                    'state_class': 'measurement',
+                    'unit_of_measurement': UnitOfLength.MILLIMETERS,
+                })
+                for hours in RAIN_WINDOWS
+            ],
+            *[
+                NumberSensorConv(f'temperature_{stat}_{ROLLING_HOURS}h', enabled=False, source='observe').with_option({
+                    'device_class': 'temperature',
+                    'state_class': 'measurement',
+                    'unit_of_measurement': UnitOfTemperature.CELSIUS,
+                })
+                for stat in ('min', 'max', 'mean')
+            ],
+            *[
+                NumberSensorConv(f'humidity_{stat}_{ROLLING_HOURS}h', enabled=False, source='observe').with_option({
+                    'device_class': 'humidity',
+                    'state_class': 'measurement',
+                    'unit_of_measurement': PERCENTAGE,
+                })
+                for stat in ('min', 'max', 'mean')
+            ],
+            NumberSensorConv(f'wind_level_max_{ROLLING_HOURS}h', precision=0, enabled=False, source='observe').with_option({
+                'icon': 'mdi:weather-windy',
+                'state_class': 'measurement',
+            }),
+            UpstreamSensorConv().with_option({
+                'icon': 'mdi:lan-connect',
+                'entity_category': EntityCategory.DIAGNOSTIC,
+            }),
+            RequestStatsSensorConv().with_option({
+                'icon': 'mdi:timer-outline',
+                'entity_category': EntityCategory.DIAGNOSTIC,
+                'state_class': 'measurement',
+                'unit_of_measurement': UnitOfTime.MILLISECONDS,
+            }),
         )
 
     @staticmethod
-    async def from_config(hass, entry):
-        hass.data.setdefault(DOMAIN, {})
-        hass.data[DOMAIN].setdefault('clients', {})
-
+    def entry_config(entry) -> dict:
         if isinstance(entry, ConfigEntry):
-            config = {
+            return {
                 'entry_id': entry.entry_id,
                 **(entry.data or {}),
                 **(entry.options or {}),
             }
-        else:
-            config = entry
+        return entry
+
+    @staticmethod
+    async def clients_from_config(hass, entry) -> List["TianqiClient"]:
+        """Client of the entry, or one client per area of a multi-area entry.
+
+        Stations of the areas missing from the cache are resolved concurrently, at most
+        `station_concurrency` at a time. Areas that fail to resolve are skipped until the next setup.
+        """
+        config = TianqiClient.entry_config(entry)
+        if not (area_ids := parse_area_ids(config.get('area_ids'))):
+            return [await TianqiClient.from_config(hass, config)]
+        semaphore = asyncio.Semaphore(int(config.get('station_concurrency') or DEFAULT_STATION_CONCURRENCY))
+
+        async def resolve(area_id):
+            async with semaphore:
+                return await TianqiClient.from_config(hass, {**config, 'area_id': area_id})
+
+        clients = []
+        results = await asyncio.gather(*[resolve(area_id) for area_id in area_ids], return_exceptions=True)
+        for area_id, res in zip(area_ids, results):
+            if isinstance(res, BaseException):
+                if len(area_ids) == 1 or not isinstance(res, Exception):
+                    raise res
+                _LOGGER.warning('Unable to set up area %s: %s', area_id, res)
+                if failed := hass.data[DOMAIN]['clients'].pop(f'{config.get("entry_id") or "yaml"}-{area_id}', None):
+                    await failed.unload()
+                continue
+            clients.append(res)
+        if not clients:
+            raise IntegrationError(f'Unable to set up any of the areas: {area_ids}')
+        return clients
+
+    @staticmethod
+    async def from_config(hass, entry):
+        hass.data.setdefault(DOMAIN, {})
+        hass.data[DOMAIN].setdefault('clients', {})
+
+        config = TianqiClient.entry_config(entry)
         entry_id = config.get('entry_id') or 'yaml'
-        client = hass.data[DOMAIN]['clients'].get(entry_id)
+        key = f'{entry_id}-{config.get("area_id")}' if config.get('area_ids') else entry_id
+        client = hass.data[DOMAIN]['clients'].get(key)
         if not client:
             client = TianqiClient(hass, config)
-            hass.data[DOMAIN]['clients'][entry_id] = client
+            hass.data[DOMAIN]['clients'][key] = client
             _LOGGER.info('New client: %s', config)
 
         if not client.station:
-            client.station = await client.get_station(area_id=config.get('area_id'))
-            _LOGGER.info('New station: %s', [entry_id, client.station.data])
+            await client.cache.async_load()
+            if client.cache.station:
+                client.station = StationInfo(client.cache.station)
+            else:
+                client.station = await client.get_station(area_id=config.get('area_id'))
+                client.cache.set_station(client.station.data)
+            client.restore_cache()
+            _LOGGER.info('New station: %s', [key, client.station.data])
         return client
 
     async def init(self):
@@ -361,10 +492,192 @@ class TianqiClient:
 
             remove_listener = coord.async_add_listener(coordinator_handler)
             self._remove_listeners.append(remove_listener)
+
+        # serve the persisted results at once and only fetch what has expired
+        for endpoint, result in self.cache.results.items():
+            self.on_result(endpoint, result)
+        if self.cache.results:
+            await self.update_entities()
+        delays = {coord.name: self.fresh_delay(coord) for coord in self.coordinators}
+        active = self.active_endpoints
+        stale = []
+        for coord in self.coordinators:
+            if delays[coord.name] is not None:
+                coord.async_set_updated_data(self.data)
+            elif coord.name in active:
+                stale.append(coord)
+
+        if self.config.get('startup_mode') == 'sequential':
+            for coord in stale:
+                await self.first_refresh(coord)
+        elif stale:
+            await self.first_refresh_all(stale, float(self.config.get('startup_timeout', DEFAULT_STARTUP_TIMEOUT)))
+        _LOGGER.info('Startup timing: %s', [self.key, self.startup_timing, self.deferred])
+
+        self.started = True
+        self.sync_jobs(delays)
+        self._remove_listeners.append(self.retry.breakers.add_listener(self._breaker_changed))
+        self.push_upstream()
+        self.push_history()
+
+    @property
+    def hosts(self) -> Set[str]:
+        return {f'{spec.node}.{self.domain}' for spec in ENDPOINTS.values()}
+
+    @callback
+    def _breaker_changed(self, breaker: CircuitBreaker):
+        if breaker.host in self.hosts:
+            self.push_upstream()
+
+    @callback
+    def push_upstream(self):
+        """Push the circuit state of the hosts of the client to the diagnostic sensor."""
+        hosts = self.retry.breakers.stats(self.hosts)
+        states = {v['state'] for v in hosts.values()}
+        state = OPEN if OPEN in states else HALF_OPEN if HALF_OPEN in states else CLOSED
+        self.push_state(self.decode({
+            'state': state,
+            'hosts': {host: v['state'] for host, v in hosts.items()},
+            'stale': sorted(self.stale),
+        }, 'upstream'))
+
+    @callback
+    def push_history(self):
+        """Push the rolling aggregates of the observed hours to their sensors."""
+        self.push_state(self.decode(self.history.aggregates(), 'observe'))
+
+    @callback
+    def push_stats(self):
+        self.push_state(self.decode({
+            'endpoints': {name: self.stats.get(name).summary() for name in ENDPOINTS},
+        }, 'stats'))
+
+    def stats_report(self) -> dict:
+        """Request histograms of the client and the state of the shared polling infrastructure, for diagnostics."""
+        return {
+            'requests': self.stats.as_dict(),
+            'scheduler': self.scheduler.stats(),
+            'retry': {
+                'retries': self.retry.retries,
+                'exhausted': self.retry.exhausted,
+                'budget': self.retry.budget.stats(),
+            },
+            'breakers': self.retry.breakers.stats(),
+            'coalescer': {'in_flight': self.coalescer.in_flight},
+            'client': {
+                'entry_id': self.entry_id,
+                'area_id': self.configured_area_id,
+                'active_endpoints': sorted(self.active_endpoints),
+                'intervals': {name: policy.interval.total_seconds() for name, policy in self.intervals.items()},
+                'stale': sorted(self.stale),
+                'observed_hours': len(self.history),
+                'startup_timing': self.startup_timing,
+                'deferred': sorted(self.deferred),
+            },
+        }
+
+    @property
+    def configured_area_id(self):
+        """Area of the station, or the configured one while the station is not resolved yet."""
+        return self.area_id if self.station else self.config.get('area_id')
+
+    @property
+    def active_sources(self) -> Set[str]:
+        """Sources read by at least one enabled entity, the upstream and stats pseudo-sources included."""
+        return set().union(*self._consumers.values())
+
+    @property
+    def active_endpoints(self) -> Set[str]:
+        """Endpoints read by at least one enabled entity."""
+        return self.active_sources & ENDPOINTS.keys()
+
+    def consumed_sources(self, attrs) -> Set[str]:
+        """Sources decoded by the converters of the attributes."""
+        sources = set()
+        for attr in attrs:
+            if not (conv := self.converters.get(attr)):
+                continue
+            if conv.source:
+                sources.add(conv.source)
+            else:
+                sources.update(name for name, spec in ENDPOINTS.items() if spec.payload)
+        return sources
+
+    @callback
+    def set_consumer(self, key, endpoints):
+        self._consumers[key] = set(endpoints)
+        self.sync_jobs()
+
+    @callback
+    def remove_consumer(self, key):
+        if self._consumers.pop(key, None) is not None:
+            self.sync_jobs()
+
+    @callback
+    def sync_jobs(self, delays=None):
+        """Poll the endpoints that have consumers, stop polling the others."""
+        if not self.started:
+            return
+        active = self.active_endpoints
+        for coord in self.coordinators:
+            if coord.name in active and coord.name not in self._jobs:
+                if delays is not None:
+                    delay = delays.get(coord.name)
+                else:
+                    # activated later, fetch at once if the cached result has expired
+                    delay = self.fresh_delay(coord) or 0
+                policy = self.intervals.get(coord.name)
+                self._jobs[coord.name] = self.scheduler.add_job(
+                    (self.key, coord.name), coord, policy.interval if policy else coord.poll_interval,
+                    host=f'{coord.node}.{self.domain}',
+                    delay=delay,
+                )
+                _LOGGER.debug('Endpoint activated: %s', [self.key, coord.name, delay])
+            elif coord.name not in active and coord.name in self._jobs:
+                self._jobs.pop(coord.name)()
+                _LOGGER.debug('Endpoint deactivated: %s', [self.key, coord.name])
+
+    def fresh_delay(self, coord: PollCoordinator):
+        """Seconds until the cached result of the coordinator expires, None if it has to be fetched now."""
+        if not (cached := self.cache.get(coord.name)):
+            return None
+        delay = coord.poll_interval.total_seconds() - cached.age
+        return delay if delay > 0 else None
+
+    async def first_refresh(self, coord: PollCoordinator):
+        start = time.monotonic()
+        try:
             await coord.async_config_entry_first_refresh()
+        finally:
+            self.startup_timing[coord.name] = round(time.monotonic() - start, 3)
+            self.deferred.discard(coord.name)
+
+    async def first_refresh_all(self, coordinators, timeout):
+        """Refresh coordinators concurrently, deferring the ones that miss the deadline."""
+        tasks = {
+            asyncio.ensure_future(self.first_refresh(coord)): coord
+            for coord in coordinators
+        }
+        done, pending = await asyncio.wait(tasks, timeout=timeout)
+        for task in pending:
+            self.deferred.add(tasks[task].name)
+            task.add_done_callback(self._deferred_refresh_done)
+        for task in done:
+            if exc := task.exception():
+                for pen in pending:
+                    pen.cancel()
+                raise exc
+
+    def _deferred_refresh_done(self, task: asyncio.Task):
+        if task.cancelled():
+            return
+        if exc := task.exception():
+            _LOGGER.warning('Deferred refresh failed: %s', [self.key, exc])
 
     def add_converter(self, conv: Converter):
         self.converters[conv.attr] = conv
+        if conv.parent:
+            self._children.setdefault(conv.parent, set()).add(conv.attr)
 
     def add_converters(self, *args: Converter):
         for conv in args:
@@ -374,17 +687,29 @@ class TianqiClient:
         attrs = {conv.attr}
         if conv.childs:
             attrs |= set(conv.childs)
-        attrs.update(c.attr for c in self.converters.values() if c.parent == conv.attr)
+        attrs |= self._children.get(conv.attr, set())
         return attrs
 
-    def decode(self, data: dict) -> dict:
-        """Decode props for HASS."""
+    def register_entity(self, entity: "XEntity"):
+        """Index the entity by the attributes it subscribes to."""
+        key = entity.conv.attr
+        self.entities[key] = entity
+        index = self._payload_subscribers if entity.payload_attrs else self._subscribers
+        for attr in entity.subscribed_attrs:
+            index.setdefault(attr, {})[key] = entity
+
+    def decode(self, data: dict, source=None) -> dict:
+        """Decode props for HASS with the converters of the source endpoint, all of them if it is None."""
         payload = {}
         for conv in self.converters.values():
-            prop = conv.prop or conv.attr
+            if source and conv.source and conv.source != source:
+                continue
             if conv.ignore_prop:
+                # a converter taking the whole payload keeps its last value while the prop it names is missing
+                if conv.prop and conv.prop not in data:
+                    continue
                 value = data
-            elif prop in data:
+            elif (prop := conv.prop or conv.attr) in data:
                 value = data[prop]
             else:
                 continue
@@ -392,20 +717,33 @@ class TianqiClient:
         return payload
 
     def push_state(self, value: dict):
-        """Push new state to Hass entities."""
+        """Push new state to the Hass entities subscribed to the attributes that changed."""
         if not value:
             return
-        attrs = value.keys()
-
-        for entity in self.entities.values():
-            if not hasattr(entity, 'subscribed_attrs'):
-                continue
-            if not (entity.subscribed_attrs & attrs):
-                continue
+        last = self._last_payload
+        changed = {k for k, v in value.items() if last.get(k, MISSING) != v}
+        if not changed:
+            return
+        last.update(value)
+
+        targets = {}
+        for attr in changed:
+            if entities := self._subscribers.get(attr):
+                targets.update(entities)
+        if self._payload_subscribers:
+            # entities showing the whole payload also follow its other keys
+            for attr in value:
+                if entities := self._payload_subscribers.get(attr):
+                    targets.update(entities)
+        for entity in targets.values():
             entity.async_set_state(value)
             if entity.added:
                 entity.async_write_ha_state()
 
+    def current_state(self, attrs) -> dict:
+        """Last pushed values of the attributes."""
+        return {k: self._last_payload[k] for k in attrs if k in self._last_payload}
+
     async def setup_entities(self, only_domain=None):
         if not self.converters:
             _LOGGER.warning('Has none converters: %s', [type(self), self.config])
@@ -427,9 +765,32 @@ class TianqiClient:
             _LOGGER.warning('Setup %s not ready for %s', conv.domain, [client, conv])
 
     async def unload(self, *args):
+        self._unloaded = True
         for rmh in self._remove_listeners:
             rmh()
         self._remove_listeners = []
+        self.started = False
+        for rmh in self._jobs.values():
+            rmh()
+        self._jobs = {}
+        # a delayed save left pending would rewrite the cache after a removal and be missed by a reload
+        await self.cache.async_flush()
+        if self._http is not None:
+            self._http = None
+            await self.sessions.release(self._http_domain)
+
+    @property
+    def http(self) -> aiohttp.ClientSession:
+        if self._unloaded:
+            # a session acquired now would never be released
+            raise AbandonedError(f'Client unloaded: {self.key}')
+        if self._http is None:
+            self._http_domain = self.domain
+            self._http = self.sessions.acquire(self._http_domain, self.config, headers={
+                'Referer': HTTP_REFERER,
+                'User-Agent': USER_AGENT,
+            }, trace_configs=[self._trace_config])
+        return self._http
 
     @property
     def device_info(self):
@@ -457,7 +818,7 @@ class TianqiClient:
     def station_name(self):
         return self.station.area_name or self.station_code
 
-    @aiohttp_retry()
+    @aiohttp_retry(node='d7')
     async def get_station(self, area_id=None, lat=None, lng=None):
         api = self.api_url('geong/v1/api', node='d7')
         pms = {'method': 'stationinfo'}
@@ -470,18 +831,19 @@ class TianqiClient:
             raise IntegrationError(f'Arguments invalid for {api}.')
 
         res = await self.http.get(api, params={
-            'params': json.dumps(pms, separators=(',', ':')),
+            'params': codec.dumps(pms),
         }, allow_redirects=False, verify_ssl=False)
-        txt = await res.text()
-        if not txt:
-            _LOGGER.error('%s: %s', api, [pms, txt, res.headers])
+        raise_for_retry(res)
+        body = await res.read()
+        if not body:
+            _LOGGER.error('%s: %s', api, [pms, body, res.headers])
         try:
-            dat = json.loads(txt) or {}
+            dat = codec.loads(body) or {}
         except Exception as exc:
-            raise IntegrationError(f'{exc}:\n{txt}') from exc
+            raise IntegrationError(f'{exc}:\n{body.decode(errors="replace")}') from exc
         inf = dat.get('data', {}).get('station') or {}
         if not inf:
-            raise IntegrationError(f'Unable to get station info: {pms} {txt}')
+            raise IntegrationError(f'Unable to get station info: {pms} {body.decode(errors="replace")}')
         return StationInfo({
             **dat.get('location', {}),
             **inf,
@@ -491,11 +853,11 @@ class TianqiClient:
         api = self.api_url('search', node='toy1')
         pms = {'cityname': name}
         res = await self.http.get(api, params=pms, allow_redirects=False, verify_ssl=False)
-        txt = await res.text()
-        if not txt:
+        body = await res.read()
+        if not body:
             raise IntegrationError(f'Empty response from: {api} {pms}')
         lst = {}
-        for v in json.loads(txt.strip('()')) or []:
+        for v in codec.loads(body.strip(b'()')) or []:
             if not (ref := v.get('ref')):
                 continue
             arr = f'{ref}'.split('~')
@@ -508,7 +870,8 @@ class TianqiClient:
     def api_url(self, api, node='d1', with_time=True):
         if not self.domain:
             raise IntegrationError('Domain cannot be empty')
-        base = f'https://{node}.{self.domain}/'
+        # `url_template` points the client at a stand-in upstream, e.g. http://127.0.0.1:8080/{node}/
+        base = (self.config.get('url_template') or 'https://{node}.{domain}/').format(node=node, domain=self.domain)
         api = api.lstrip('/')
         if with_time:
             tim = int(time.time() * 1000)
@@ -525,148 +888,261 @@ class TianqiClient:
                 continue
             await entity.update_from_client()
 
-    async def update_summary_and_entities(self, **kwargs):
-        await self.update_summary(**kwargs)
-        await self.update_entities()
+    async def poll_endpoint(self, spec: EndpointSpec):
+        result = await self.update_endpoint(spec)
+        if self.intervals:
+            self.adapt_interval(spec, result)
+        if 'stats' in self.active_sources:
+            self.push_stats()
+        if spec.refresh_entities:
+            await self.update_entities()
         return self.data
 
-    @aiohttp_retry()
-    async def update_summary(self, **kwargs):
-        api = self.api_url('weather_index/%s.html' % kwargs.get('area_id', self.area_id))
-        res = await self.http.get(api, allow_redirects=False, verify_ssl=False)
-        txt = await res.text()
-        if not txt:
-            raise IntegrationError(f'Empty response from: {api}')
-        if res.status != 200:
-            self.data['summary_text'] = txt
-        else:
-            self.data.pop('summary_text', None)
-
-        if match := re.search(r'dataSK\s*=\s*({.*?})\s*;', txt, re.DOTALL):
-            self.data['dataSK'] = json.loads(match.group(1)) or {}
-            self.push_state(self.decode(self.data['dataSK']))
-
-        if match := re.search(r'dataZS\s*=\s*({.*?})\s*;', txt, re.DOTALL):
-            self.data['dataZS'] = (json.loads(match.group(1)) or {}).get('zs') or {}
+    @callback
+    def adapt_interval(self, spec: EndpointSpec, result: EndpointResult):
+        """Back off while the endpoint brings nothing new, poll storm endpoints faster while a storm lasts."""
+        storm = storm_active(self.data)
+        if storm != self.storm:
+            self.storm = storm
+            _LOGGER.info('Storm %s: %s', 'started' if storm else 'ended', self.key)
+            for name, policy in self.intervals.items():
+                if name != spec.name and ENDPOINTS[name].storm:
+                    self.scheduler.set_interval((self.key, name), policy.set_storm(storm))
+        if not (policy := self.intervals.get(spec.name)):
+            return
+        version = spec.version(result) if spec.version else result
+        interval = policy.update(version, storm and spec.storm)
+        self.scheduler.set_interval((self.key, spec.name), interval)
+        _LOGGER.debug('Interval of %s: %s', [self.key, spec.name], interval)
+
+    async def update_endpoint(self, spec: EndpointSpec, area_id=None) -> EndpointResult:
+        """Fetch an endpoint, sharing one upstream request per endpoint and area between all clients."""
+        if self._unloaded:
+            raise AbandonedError(f'Client unloaded: {self.key}')
+        area_id = area_id or self.area_id
+        key = (self.domain, spec.name, area_id)
+        try:
+            result = await self.coalescer.run(key, lambda: self.fetch_with_retry(spec, area_id))
+        except CircuitOpenError:
+            if not (result := self.previous_result(spec.name, area_id)):
+                raise
+            _LOGGER.debug('Serving stale %s, upstream is down', [self.key, spec.name])
+            if area_id == self.area_id and spec.name not in self.stale:
+                self.stale.add(spec.name)
+                self.push_upstream()
+            return result
+        if area_id == self.area_id and spec.name in self.stale:
+            self.stale.discard(spec.name)
+            self.push_upstream()
+        if self._unloaded:
+            # unloaded while the request was in flight
+            return result
+        if area_id == self.area_id and result_ok(spec, result):
+            # an unchanged result or one of a fast endpoint waits for the next write instead of causing one
+            save = self.cache.get(spec.name) is not result and spec.interval.total_seconds() > PERSIST_INTERVAL
+            self.cache.set(spec.name, result, save=save)
+        if self._applied.get(spec.name) is result:
+            # unchanged upstream, nothing to decode or push
+            return result
+        self.on_result(spec.name, result)
+        return result
+
+    async def fetch_with_retry(self, spec: EndpointSpec, area_id) -> EndpointResult:
+        """Fetch with the retry policy of the endpoint, retrying for no longer than a share of its interval."""
+        policy = self.intervals.get(spec.name)
+        interval = policy.interval if policy else spec.interval
+        return await self.retry.run(
+            partial(self.fetch_endpoint, spec, area_id),
+            host=f'{spec.node}.{self.domain}',
+            policy=spec.retry,
+            max_elapsed=interval.total_seconds() * INTERVAL_SHARE,
+            name=f'{spec.name}/{area_id}',
+            on_retry=self.stats.get(spec.name).retried,
+        )
 
-        return self.data
+    async def fetch_endpoint(self, spec: EndpointSpec, area_id) -> EndpointResult:
+        if self._unloaded:
+            # a retry due after the client was unloaded
+            raise AbandonedError(f'Client unloaded: {self.key}')
+        start = time.perf_counter()
+        try:
+            with_time = spec.keep_buster or not self.conditional
+            api = self.api_url(spec.url_path(area_id), spec.node, with_time=with_time)
+            if spec.variables:
+                result, values = await self.fetch_vars(spec.name, area_id, api, spec.variables)
+            else:
+                params = spec.params(self) if spec.params else None
+                result, values = await self.fetch_json(spec.name, area_id, api, params)
+            if values is None:
+                return result
+            if result.status == 200 and not spec.complete(values):
+                # retried, and counted against the host, instead of replacing the last good result
+                raise MissingPayloadError(f'No {spec.name} payload in {api}')
+            return spec.build(result, values, api)
+        finally:
+            self.stats.record(spec.name, 'total', (time.perf_counter() - start) * 1000)
 
-    @aiohttp_retry()
-    async def update_alarms(self, **kwargs):
-        api = self.api_url('dingzhi/%s.html' % kwargs.get('area_id', self.area_id))
-        res = await self.http.get(api, allow_redirects=False, verify_ssl=False)
-        txt = await res.text()
-        if not txt:
-            raise IntegrationError(f'Empty response from: {api}')
+    @property
+    def conditional(self):
+        return bool(self.config.get('conditional_requests'))
+
+    def previous_result(self, endpoint, area_id) -> Optional[EndpointResult]:
+        if prev := self.coalescer.last((self.domain, endpoint, area_id)):
+            return prev
+        if area_id == self.area_id:
+            return self.cache.get(endpoint)
+        return None
+
+    def conditional_headers(self, endpoint, area_id) -> Tuple[dict, Optional[EndpointResult]]:
+        headers = {}
+        prev = self.previous_result(endpoint, area_id) if self.conditional else None
+        if prev:
+            if prev.etag:
+                headers['If-None-Match'] = prev.etag
+            if prev.last_modified:
+                headers['If-Modified-Since'] = prev.last_modified
+        return headers, prev
+
+    async def fetch_json(self, endpoint, area_id, api, params=None) -> Tuple[EndpointResult, Optional[dict]]:
+        """Get a JSON API as {None: body}, with no body but the previous result when conditional requests find it unchanged."""
+        headers, prev = self.conditional_headers(endpoint, area_id)
+        res = await self.http.get(
+            api, params=params, headers=headers, allow_redirects=False, verify_ssl=False,
+            trace_request_ctx={'endpoint': endpoint, 'stats': self.stats},
+        )
+        if prev and res.status == 304:
+            res.release()
+            return prev.touch(), None
+        raise_for_retry(res, ENDPOINTS[endpoint].retry.retry_status)
+        body = await res.read()
+        if not body:
+            raise IntegrationError(f'Empty response from: {api} {params}')
+        digest = hashlib.sha1(body).hexdigest() if self.conditional else None
+        if prev and res.status == 200 and digest == prev.digest:
+            return prev.touch(), None
+        result = EndpointResult(digest=digest).set_validators(res.headers)
+        result.status = res.status
+        result[f'{endpoint}_text'] = body.decode(res.get_encoding(), 'replace') if res.status != 200 else None
+        self.stats.record_bytes(endpoint, len(body))
+        start = time.perf_counter()
+        values = {None: codec.loads(body)}
+        self.stats.record(endpoint, 'parse', (time.perf_counter() - start) * 1000)
+        return result, values
+
+    async def fetch_vars(self, endpoint, area_id, api, spec: JsVars) -> Tuple[EndpointResult, Optional[dict]]:
+        """Stream a page until its embedded variables are extracted, with no variables but the previous result when unchanged."""
+        headers, prev = self.conditional_headers(endpoint, area_id)
+        res = await self.http.get(
+            api, headers=headers, allow_redirects=False, verify_ssl=False,
+            trace_request_ctx={'endpoint': endpoint, 'stats': self.stats},
+        )
+        if prev and res.status == 304:
+            res.release()
+            return prev.touch(), None
+        raise_for_retry(res, ENDPOINTS[endpoint].retry.retry_status)
+        result = EndpointResult().set_validators(res.headers)
+        result.status = res.status
         if res.status != 200:
-            self.data['alarms_text'] = txt
-        else:
-            self.data.pop('alarms_text', None)
-
-        if match := re.search(r'var alarmDZ\w*\s*=\s*({.*})', txt, re.DOTALL):
-            self.data['alarms'] = (json.loads(match.group(1)) or {}).get('w') or []
-            self.push_state(self.decode(self.data))
-
-        return self.data
-
-    @aiohttp_retry()
-    async def update_dailies(self, **kwargs):
-        api = self.api_url('weixinfc/%s.html' % kwargs.get('area_id', self.area_id))
-        res = await self.http.get(api, allow_redirects=False, verify_ssl=False)
-        txt = await res.text()
-        if not txt:
+            body = await res.read()
+            if not body:
+                raise IntegrationError(f'Empty response from: {api}')
+            result[f'{endpoint}_text'] = body.decode(res.get_encoding(), 'replace')
+            return result, spec.extract(body)
+
+        # the body is hashed as it streams, an unchanged one is known before anything is scanned or decoded
+        digest = ((prev and prev.digest) or '') if self.conditional else None
+        scanner = await spec.extract_stream(res.content.iter_chunked(CHUNK_SIZE), digest)
+        if not scanner.bytes_read:
             raise IntegrationError(f'Empty response from: {api}')
-        if res.status != 200:
-            self.data['dailies_text'] = txt
-        else:
-            self.data.pop('dailies_text', None)
+        await self.finish_response(res)
+        self.stats.record_bytes(endpoint, scanner.bytes_read)
+        if scanner.unchanged:
+            return prev.touch(), None
+        self.stats.record(endpoint, 'parse', scanner.parse_time * 1000)
+        result[f'{endpoint}_text'] = None
+        result.digest = scanner.digest
+        return result, scanner.results
 
-        if match := re.search(r'fc\s*=\s*({.*})', txt, re.DOTALL):
-            self.data['dailies'] = (json.loads(match.group(1)) or {}).get('f') or []
+    @staticmethod
+    async def finish_response(res: aiohttp.ClientResponse):
+        """Drop the rest of a page once its variables are extracted."""
+        if not res.content.at_eof():
+            if res.content_length is None or res.content_length > DRAIN_LIMIT:
+                # cheaper to lose the connection than to download the rest
+                res.close()
+                return
+            await res.content.read()
+        res.release()
+
+    def on_result(self, endpoint, result: dict):
+        self._applied[endpoint] = result
+        self.apply_result(result)
+        if endpoint == 'observe' and (hours := result.get('observe')):
+            if self.history.merge(hours.values()):
+                self.cache.set_history(self.history)
+                self.push_history()
+        spec = ENDPOINTS.get(endpoint)
+        if spec and spec.payload and (payload := spec.payload(result)) is not None:
+            self.push_state(self.decode(payload, endpoint))
+
+    def apply_result(self, result: dict):
+        for k, v in result.items():
+            if v is None:
+                self.data.pop(k, None)
+            else:
+                self.data[k] = v
+
+    def restore_cache(self):
+        """Load the persisted results into data before entities are set up."""
+        if isinstance(self.cache.history, dict):
+            self.history = ObserveHistory.from_dict(self.cache.history, self.history.capacity)
+            self.cache.history = self.history
+        for endpoint, result in self.cache.results.items():
+            if (spec := ENDPOINTS.get(endpoint)) and spec.restore:
+                spec.restore(result)
+            self.apply_result(result)
+
+    def service_data(self) -> dict:
+        """The data as the update services returned it, the records turned back into upstream shaped JSON."""
+        data = dict(self.data)
+        if isinstance(hourlies := data.get('hourlies'), HourlySeries):
+            data['hourlies'] = hourlies.items()
+        if dailies := data.get('dailies'):
+            data['dailies'] = [row.as_item() if isinstance(row, DailyRow) else row for row in dailies]
+        if 'observe' in data:
+            data['observe'] = observe_items(data['observe'])
+        return data
 
-        return self.data
+    async def update_summary(self, **kwargs):
+        await self.update_endpoint(ENDPOINTS['summary'], kwargs.get('area_id'))
+        return self.service_data()
 
-    @aiohttp_retry()
-    async def update_hourlies(self, **kwargs):
-        api = self.api_url('wap_180h/%s.html' % kwargs.get('area_id', self.area_id))
-        res = await self.http.get(api, allow_redirects=False, verify_ssl=False)
-        txt = await res.text()
-        if not txt:
-            raise IntegrationError(f'Empty response from: {api}')
-        if res.status != 200:
-            self.data['hourlies_text'] = txt
-        else:
-            self.data.pop('hourlies_text', None)
+    async def update_alarms(self, **kwargs):
+        await self.update_endpoint(ENDPOINTS['alarms'], kwargs.get('area_id'))
+        return self.service_data()
 
-        if match := re.search(r'fc180\s*=\s*({.*})', txt, re.DOTALL):
-            self.data['hourlies'] = (json.loads(match.group(1)) or {}).get('jh') or []
+    async def update_dailies(self, **kwargs):
+        await self.update_endpoint(ENDPOINTS['dailies'], kwargs.get('area_id'))
+        return self.service_data()
 
-        return self.data
+    async def update_hourlies(self, **kwargs):
+        await self.update_endpoint(ENDPOINTS['hourlies'], kwargs.get('area_id'))
+        return self.service_data()
 
-    @aiohttp_retry()
     async def update_minutely(self, **kwargs):
-        api = self.api_url('mpf_v3/webgis/minute', 'mpf')
-        pms = {
-            'lat': self.station.latitude,
-            'lon': self.station.longitude,
-        }
-        res = await self.http.get(api, params=pms, allow_redirects=False, verify_ssl=False)
-        txt = await res.text()
-        if not txt:
-            raise IntegrationError(f'Empty response from: {api} {pms}')
-        if res.status != 200:
-            self.data['minutely_text'] = txt
-        else:
-            self.data.pop('minutely_text', None)
+        await self.update_endpoint(ENDPOINTS['minutely'])
+        return self.service_data()
 
-        self.data['minutely'] = json.loads(txt) or {}
-        self.push_state(self.decode(self.data['minutely']))
+    async def update_observe(self, **kwargs):
+        result = await self.update_endpoint(ENDPOINTS['observe'], kwargs.get('area_id'))
+        if error := result.get('observe_error'):
+            return error
+        return observe_items(result.get('observe'))
 
-        return self.data
 
-    @aiohttp_retry()
-    async def update_observe(self, **kwargs):
-        api = self.api_url('weather/%s.shtml' % kwargs.get('area_id', self.area_id), 'www')
-        res = await self.http.get(api, allow_redirects=False, verify_ssl=False)
-        txt = await res.text()
-
-        fmt = '%Y%m%d%H%M'
-        dat = {}
-        if match := re.search(r'observe24h_data\s*=\s*({.*?})\s*;', txt, re.DOTALL):
-            rdt = (json.loads(match.group(1)) or {}).get('od') or {}
-            lst = rdt.get('od2') or []
-            lst.reverse()
-            try:
-                stm = datetime.strptime(rdt.get('od0', ''), fmt)
-            except ValueError as exc:
-                dat = {
-                    'error': str(exc),
-                    'api': api,
-                    'data': rdt,
-                }
-                self.log.warning('Update observe failed: %s', dat)
-                return dat
-            for v in lst:
-                tim = stm.replace(hour=int(v.get('od21', 0)))
-                if tim < stm:
-                    tim = tim + timedelta(days=1)
-                stm = tim
-                try:
-                    dat[tim.strftime(fmt)] = {
-                        **v,
-                        'aqi': v.get('od28'),
-                        'temp': float(v.get('od22')),
-                        'humi': float(v.get('od27')),
-                        'rain': float(v.get('od26') or 0),
-                        'wind': v.get('od24'),
-                        'wind_level': float(v.get('od25') or 0),
-                        'wind_angel': float(v.get('od23') or 0),
-                    }
-                except (TypeError, ValueError):
-                    pass
-        if dat:
-            self.data['observe'] = dat
-        return dat
+def observe_items(hours: dict) -> dict:
+    """JSON friendly hours keyed by `%Y%m%d%H%M`, as before they were kept as ObserveHour records."""
+    return {wall_datetime(tim).strftime('%Y%m%d%H%M'): hour.as_item() for tim, hour in (hours or {}).items()}
 
 
 class XEntity(Entity):
@@ -695,11 +1171,16 @@ class XEntity(Entity):
         self._attr_extra_state_attributes = {}
         self._vars = {}
         self.subscribed_attrs = client.subscribe_attrs(conv)
-        client.entities[conv.attr] = self
+        self.payload_attrs = bool(self._option.get('payload_attrs'))
+        client.register_entity(self)
 
     async def async_added_to_hass(self):
         """Run when entity about to be added to hass."""
         self.added = True
+        self.client.set_consumer(self.conv.attr, self.client.consumed_sources(self.subscribed_attrs))
+        if data := self.client.current_state(self.subscribed_attrs):
+            # values pushed before the entity was added are not pushed again until they change
+            self.async_set_state(data)
         if hasattr(self, 'async_get_last_state'):
             state: State = await self.async_get_last_state()
             if state:
@@ -708,6 +1189,10 @@ class XEntity(Entity):
 
         await super().async_added_to_hass()
 
+    async def async_will_remove_from_hass(self):
+        self.client.remove_consumer(self.conv.attr)
+        await super().async_will_remove_from_hass()
+
     @callback
     def async_restore_last_state(self, state: str, attrs: dict):
         """Restore previous state."""
@@ -721,21 +1206,12 @@ class XEntity(Entity):
         if self._name in data:
             self._attr_state = data[self._name]
             self._attr_entity_picture = self._option.get('entity_picture')
-        if self._option.get('payload_attrs'):
+        if self.payload_attrs:
             self._attr_extra_state_attributes = data.copy()
         else:
             for k in self.subscribed_attrs:
                 if k not in data:
                     continue
                 self._attr_extra_state_attributes[k] = data[k]
-        _LOGGER.info('%s: State changed: %s', self.entity_id, data)
-
+        _LOGGER.debug('%s: State changed: %s', self.entity_id, data)
 
-class StationInfo:
-    def __init__(self, data: dict):
-        self.data = data
-        self.area_id = data.get('areaid')
-        self.area_name = data.get('namecn')
-        self.area_code = data.get('nameen')
-        self.latitude = data.get('lat')
-        self.longitude = data.get('lng')
@@ -0,0 +1,58 @@
+from datetime import timedelta
+from typing import Any
+
+DEFAULT_MIN_SCALE = 0.5
+DEFAULT_MAX_SCALE = 6.0
+BACKOFF = 1.5  # scale growth per poll that brought nothing new
+
+
+def storm_active(data: dict) -> bool:
+    """Alarms in force or rain in the minutely forecast."""
+    if data.get('alarms'):
+        return True
+    minutely = data.get('minutely') or {}
+    for value in minutely.get('values') or []:
+        try:
+            if float(value) > 0:
+                return True
+        except (TypeError, ValueError):
+            continue
+    return False
+
+
+class AdaptiveInterval:
+    """Poll interval of one endpoint, a multiple of its base interval within [min_scale, max_scale].
+
+    The scale grows while the upstream keeps returning the same version, drops back to 1 when
+    it changes, and to min_scale during storms for endpoints that follow them.
+    """
+
+    def __init__(self, base: timedelta, min_scale=DEFAULT_MIN_SCALE, max_scale=DEFAULT_MAX_SCALE, backoff=BACKOFF):
+        self.base = base
+        self.min_scale = min(min_scale, max_scale)
+        self.max_scale = max(min_scale, max_scale)
+        self.backoff = backoff
+        self.scale = self._clamp(1.0)
+        self.version: Any = None
+
+    def _clamp(self, scale):
+        return min(self.max_scale, max(self.min_scale, scale))
+
+    @property
+    def interval(self) -> timedelta:
+        return self.base * self.scale
+
+    def update(self, version, storm=False) -> timedelta:
+        if storm:
+            self.scale = self.min_scale
+        elif version is not None and version == self.version:
+            self.scale = self._clamp(self.scale * self.backoff)
+        else:
+            self.scale = self._clamp(1.0)
+        self.version = version
+        return self.interval
+
+    def set_storm(self, storm: bool) -> timedelta:
+        """Jump to the storm scale, or back to the base interval when it ends."""
+        self.scale = self.min_scale if storm else self._clamp(1.0)
+        return self.interval
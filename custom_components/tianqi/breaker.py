@@ -0,0 +1,117 @@
+import logging
+import time
+
+from typing import Callable, Dict
+
+_LOGGER = logging.getLogger(__name__)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+FAILURE_THRESHOLD = 5  # consecutive failures that open the circuit
+RESET_TIMEOUT = 60  # seconds before the first probe
+MAX_RESET_TIMEOUT = 900  # the wait doubles after every failed probe up to this
+
+
+class CircuitOpenError(Exception):
+    """The upstream host is considered down, the request was not sent."""
+
+
+class CircuitBreaker:
+    def __init__(self, host, threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT, on_change=None):
+        self.host = host
+        self.threshold = threshold
+        self.base_timeout = reset_timeout
+        self.reset_timeout = reset_timeout
+        self.on_change = on_change
+        self.state = CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.probing = False
+        self.rejected = 0
+
+    def allow(self) -> bool:
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN and time.monotonic() - self.opened_at >= self.reset_timeout:
+            self._set(HALF_OPEN)
+        if self.state == HALF_OPEN and not self.probing:
+            # a single request finds out whether the host is back
+            self.probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def abort(self):
+        """The request ended without telling anything about the host."""
+        self.probing = False
+
+    def success(self):
+        self.failures = 0
+        self.probing = False
+        self.reset_timeout = self.base_timeout
+        if self.state != CLOSED:
+            _LOGGER.info('Circuit closed for %s', self.host)
+            self._set(CLOSED)
+
+    def failure(self):
+        self.failures += 1
+        if self.state == HALF_OPEN:
+            self.probing = False
+            self.reset_timeout = min(self.reset_timeout * 2, MAX_RESET_TIMEOUT)
+            self._open()
+        elif self.state == CLOSED and self.failures >= self.threshold:
+            _LOGGER.warning('Circuit opened for %s after %s failures', self.host, self.failures)
+            self._open()
+
+    def _open(self):
+        self.opened_at = time.monotonic()
+        self._set(OPEN)
+
+    def _set(self, state):
+        if state == self.state:
+            return
+        self.state = state
+        if self.on_change:
+            self.on_change(self)
+
+    def stats(self):
+        return {
+            'state': self.state,
+            'failures': self.failures,
+            'rejected': self.rejected,
+            'retry_in': max(0, round(self.opened_at + self.reset_timeout - time.monotonic())) if self.state == OPEN else 0,
+        }
+
+
+class CircuitBreakers:
+    """Breakers keyed by upstream host, shared by every client."""
+
+    def __init__(self, threshold=FAILURE_THRESHOLD, reset_timeout=RESET_TIMEOUT):
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout
+        self._breakers: Dict[str, CircuitBreaker] = {}
+        self._listeners = []
+
+    def get(self, host) -> CircuitBreaker:
+        if not (breaker := self._breakers.get(host)):
+            breaker = self._breakers[host] = CircuitBreaker(
+                host, self.threshold, self.reset_timeout, on_change=self._changed,
+            )
+        return breaker
+
+    def add_listener(self, listener: Callable[[CircuitBreaker], None]) -> Callable:
+        self._listeners.append(listener)
+        return lambda: self._listeners.remove(listener)
+
+    def _changed(self, breaker: CircuitBreaker):
+        for listener in list(self._listeners):
+            listener(breaker)
+
+    def stats(self, hosts=None):
+        return {
+            host: breaker.stats()
+            for host, breaker in self._breakers.items()
+            if hosts is None or host in hosts
+        }
@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import time
+
+from typing import Dict, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.storage import Store
+
+_LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 1
+SAVE_DELAY = 30
+# seconds, results of endpoints polled this often or more are not worth a write of their own,
+# they are written along with the next save or when the client unloads
+PERSIST_INTERVAL = 300
+
+
+def result_ok(spec, result: dict):
+    """Whether the result of the EndpointSpec is worth caching: no error and at least one of its fields."""
+    if result.get(f'{spec.name}_text') or result.get(f'{spec.name}_error'):
+        return False
+    return not spec.fields or any(field.key in result for field in spec.fields)
+
+
+class EndpointResult(dict):
+    """Parsed endpoint payload, plus the fetch time and HTTP validators of its response."""
+
+    status = None
+
+    def __init__(self, *args, fetched=None, etag=None, last_modified=None, digest=None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.fetched = fetched or time.time()
+        self.etag = etag
+        self.last_modified = last_modified
+        self.digest = digest
+
+    def set_validators(self, headers):
+        self.etag = headers.get('ETag')
+        self.last_modified = headers.get('Last-Modified')
+        return self
+
+    def touch(self):
+        """Mark the result as confirmed unchanged by the upstream."""
+        self.fetched = time.time()
+        return self
+
+    @property
+    def age(self):
+        return time.time() - self.fetched
+
+
+class ResponseCache:
+    """Last successful result of each endpoint for one client, persisted across restarts."""
+
+    def __init__(self, hass: HomeAssistant, key: str, group: Optional["GroupCache"] = None):
+        self.group = group
+        self.key = key
+        self.store = group.store if group else Store(hass, STORAGE_VERSION, f'tianqi.cache.{key}')
+        self.station: Optional[dict] = None
+        self.results = {}  # endpoint: EndpointResult
+        self.history = None  # ObserveHistory, or its cached dict until the client loads it
+        self.loaded = False
+        self.dirty = False  # changed since the last write
+
+    async def async_load(self):
+        if self.loaded:
+            return self
+        self.loaded = True
+        if self.group:
+            data = (await self.group.async_load()).get(self.key) or {}
+        else:
+            data = await _load_store(self.store)
+        self.station = data.get('station')
+        self.history = data.get('history')
+        for endpoint, ent in (data.get('endpoints') or {}).items():
+            self.results[endpoint] = EndpointResult(
+                ent.get('data') or {},
+                fetched=ent.get('time'),
+                etag=ent.get('etag'),
+                last_modified=ent.get('last_modified'),
+                digest=ent.get('digest'),
+            )
+        return self
+
+    def get(self, endpoint) -> Optional[EndpointResult]:
+        return self.results.get(endpoint)
+
+    @callback
+    def set(self, endpoint, result: EndpointResult, save=True):
+        """Keep the result, scheduling a write only if `save`, the others wait for the next write."""
+        self.results[endpoint] = result
+        if save:
+            self.async_delay_save()
+        else:
+            (self.group or self).dirty = True
+
+    @callback
+    def set_station(self, station: dict):
+        self.station = station
+        self.async_delay_save()
+
+    @callback
+    def set_history(self, history):
+        self.history = history
+        self.async_delay_save()
+
+    @callback
+    def async_delay_save(self):
+        if self.group:
+            self.group.async_delay_save()
+        else:
+            self.dirty = True
+            self.store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_flush(self):
+        """Write unsaved changes now, so the store holds nothing back for a reload or a removal."""
+        if self.group:
+            await self.group.async_flush()
+        elif self.dirty:
+            await self.store.async_save(self._data_to_save())
+
+    @callback
+    def _data_to_save(self):
+        self.dirty = False
+        return {
+            'station': self.station,
+            'history': self.history,
+            'endpoints': {
+                endpoint: {
+                    'time': result.fetched,
+                    'etag': result.etag,
+                    'last_modified': result.last_modified,
+                    'digest': result.digest,
+                    'data': dict(result),
+                }
+                for endpoint, result in self.results.items()
+            },
+        }
+
+    async def async_remove(self):
+        self.results = {}
+        self.station = None
+        self.history = None
+        if self.group:
+            self.group.areas.pop(self.key, None)
+            self.group.async_delay_save()
+        else:
+            self.dirty = False
+            await self.store.async_remove()
+
+
+class GroupCache:
+    """Caches of every area of a multi-area entry in one store, one file and one write for all of them."""
+
+    def __init__(self, hass: HomeAssistant, key: str):
+        self.hass = hass
+        self.store = Store(hass, STORAGE_VERSION, f'tianqi.cache.{key}')
+        self.areas: Dict[str, ResponseCache] = {}
+        self._data = None
+        self._lock = asyncio.Lock()
+        self.dirty = False
+
+    def area(self, area_id) -> ResponseCache:
+        if not (cache := self.areas.get(area_id)):
+            cache = self.areas[area_id] = ResponseCache(self.hass, area_id, group=self)
+        return cache
+
+    async def async_load(self) -> dict:
+        """Persisted data of every area, read once however many areas ask for it."""
+        async with self._lock:
+            if self._data is None:
+                self._data = (await _load_store(self.store)).get('areas') or {}
+        return self._data
+
+    @callback
+    def async_delay_save(self):
+        self.dirty = True
+        self.store.async_delay_save(self._data_to_save, SAVE_DELAY)
+
+    async def async_flush(self):
+        if self.dirty:
+            await self.store.async_save(self._data_to_save())
+
+    @callback
+    def _data_to_save(self):
+        self.dirty = False
+        return {'areas': {area_id: cache._data_to_save() for area_id, cache in self.areas.items() if cache.loaded}}
+
+    async def async_remove(self):
+        self.areas = {}
+        self._data = None
+        self.dirty = False
+        await self.store.async_remove()
+
+
+async def _load_store(store: Store) -> dict:
+    try:
+        return await store.async_load() or {}
+    except Exception as exc:
+        _LOGGER.warning('Failed to load cache %s: %s', store.key, exc)
+        return {}
@@ -0,0 +1,52 @@
+import asyncio
+import logging
+import time
+
+from functools import partial
+from typing import Any, Awaitable, Callable, Hashable
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_TTL = 10
+
+
+class RequestCoalescer:
+    """Single-flight registry that shares in-flight and recently fetched results between clients."""
+
+    def __init__(self, ttl: float = DEFAULT_TTL):
+        self.ttl = ttl
+        self._flights = {}  # key: task
+        self._results = {}  # key: (monotonic time, result)
+
+    async def run(self, key: Hashable, factory: Callable[[], Awaitable[Any]], ttl=None):
+        ttl = self.ttl if ttl is None else ttl
+        if (hit := self._results.get(key)) and time.monotonic() - hit[0] < ttl:
+            _LOGGER.debug('Shared result for %s', key)
+            return hit[1]
+        if not (task := self._flights.get(key)):
+            # the fetch runs as its own task, so a cancelled caller never cancels the other subscribers
+            task = asyncio.ensure_future(factory())
+            task.add_done_callback(partial(self._done, key))
+            self._flights[key] = task
+        else:
+            _LOGGER.debug('Joined in-flight request for %s', key)
+        return await asyncio.shield(task)
+
+    def _done(self, key, task: asyncio.Future):
+        self._flights.pop(key, None)
+        if task.cancelled() or task.exception() is not None:
+            return
+        self._results[key] = (time.monotonic(), task.result())
+
+    def last(self, key: Hashable):
+        """Latest result of the key, even if its TTL has expired."""
+        if hit := self._results.get(key):
+            return hit[1]
+        return None
+
+    def invalidate(self, key: Hashable):
+        self._results.pop(key, None)
+
+    @property
+    def in_flight(self):
+        return len(self._flights)
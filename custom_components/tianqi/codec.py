@@ -0,0 +1,39 @@
+"""JSON codec used for upstream payloads: orjson when installed (it ships with HA), then ujson, then stdlib."""
+import json
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import ujson
+except ImportError:
+    ujson = None
+
+if orjson:
+    BACKEND = 'orjson'
+
+    def loads(data):
+        return orjson.loads(data)
+
+    def dumps(obj) -> str:
+        return orjson.dumps(obj).decode()
+
+elif ujson:
+    BACKEND = 'ujson'
+
+    def loads(data):
+        return ujson.loads(data)
+
+    def dumps(obj) -> str:
+        return ujson.dumps(obj, ensure_ascii=False)
+
+else:
+    BACKEND = 'json'
+
+    def loads(data):
+        return json.loads(data)
+
+    def dumps(obj) -> str:
+        return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
@@ -1,12 +1,17 @@
+import hashlib
 import logging
 import re
 import voluptuous as vol
 
+from typing import Set
+
 from homeassistant import config_entries
 from homeassistant.core import callback
 from homeassistant.const import CONF_DOMAIN
 
-from . import TianqiClient, DOMAIN
+from . import TianqiClient, DOMAIN, parse_area_ids
+from .adaptive import DEFAULT_MIN_SCALE, DEFAULT_MAX_SCALE
+from .history import DEFAULT_OBSERVE_HOURS
 
 _LOGGER = logging.getLogger(__name__)
 CONF_SEARCH = 'search'
@@ -29,6 +34,7 @@ class TianqiConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         search = user_input.get(CONF_SEARCH)
         domain = user_input.get(CONF_DOMAIN) or ''
         area_id = user_input.get('area_id', '')
+        area_ids = parse_area_ids(user_input.get('area_ids'))
         domain = re.sub(r'^\s*https?://|/+\s*$', '', domain, flags=re.IGNORECASE)
         client = TianqiClient(self.hass, {CONF_DOMAIN: domain})
 
@@ -38,35 +44,66 @@ class TianqiConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
                 area_id = 'auto'
                 user_input.setdefault('area_id', area_id)
 
-        if search:
-            if areas := await client.search_areas(search):
-                areas = {
-                    'auto': '自动获取',
-                    **areas,
-                }
-                if area_id not in areas:
-                    area_id = ''
-                schema.update({
-                    vol.Optional('area_id', default=area_id): vol.In(areas),
-                })
-            else:
-                self.context['last_error'] = f'未找到与【{search}】相关的地点'
-
-        elif area_id:
-            await self.async_set_unique_id(area_id)
-            self._abort_if_unique_id_configured()
-            try:
-                station = await client.get_station(area_id=area_id)
-            except Exception as exc:
-                station = None
-                self.context['last_error'] = f'{exc}'
-            if station:
-                self.context['station'] = station
-                user_input.pop(CONF_SEARCH, None)
-                return self.async_create_entry(
-                    title=station.area_name,
-                    data=user_input,
-                )
+        try:
+            if area_ids and domain:
+                invalid = [v for v in area_ids if not re.fullmatch(r'\d{9}', v)]
+                if invalid:
+                    self.context['last_error'] = f'区域ID格式错误：{"、".join(invalid)}'
+                else:
+                    unique = hashlib.sha1(','.join(sorted(area_ids)).encode()).hexdigest()[:16]
+                    await self.async_set_unique_id(f'areas-{unique}')
+                    self._abort_if_unique_id_configured()
+                    if self.configured_area_ids() & set(area_ids):
+                        return self.async_abort(reason='already_configured')
+                    try:
+                        # the rest are resolved concurrently when the entry is set up
+                        station = await client.get_station(area_id=area_ids[0])
+                    except Exception as exc:
+                        station = None
+                        self.context['last_error'] = f'{exc}'
+                    if station:
+                        data = {k: v for k, v in user_input.items() if k not in (CONF_SEARCH, 'area_id')}
+                        data['area_ids'] = area_ids
+                        return self.async_create_entry(
+                            title=f'{station.area_name}等{len(area_ids)}个地点',
+                            data=data,
+                        )
+
+            elif search:
+                if areas := await client.search_areas(search):
+                    areas = {
+                        'auto': '自动获取',
+                        **areas,
+                    }
+                    if area_id not in areas:
+                        area_id = ''
+                    schema.update({
+                        vol.Optional('area_id', default=area_id): vol.In(areas),
+                    })
+                else:
+                    self.context['last_error'] = f'未找到与【{search}】相关的地点'
+
+            elif area_id:
+                await self.async_set_unique_id(area_id)
+                self._abort_if_unique_id_configured()
+                if area_id in self.configured_area_ids():
+                    return self.async_abort(reason='already_configured')
+                try:
+                    station = await client.get_station(area_id=area_id)
+                except Exception as exc:
+                    station = None
+                    self.context['last_error'] = f'{exc}'
+                if station and station.area_id in self.configured_area_ids():
+                    return self.async_abort(reason='already_configured')
+                if station:
+                    self.context['station'] = station
+                    user_input.pop(CONF_SEARCH, None)
+                    return self.async_create_entry(
+                        title=station.area_name,
+                        data=user_input,
+                    )
+        finally:
+            await client.unload()
 
         if not self.context.get('last_error'):
             self.context['last_error'] = '输入城市/区县名称后搜索，如果留空则根据HA配置中的位置自动获取'
@@ -76,6 +113,7 @@ class TianqiConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             vol.Required(CONF_DOMAIN, default=user_input.get(CONF_DOMAIN, latest_domain)): str,
             vol.Optional(CONF_SEARCH, default=''): str,
             **schema,
+            vol.Optional('area_ids', default=', '.join(area_ids)): str,
             vol.Optional('caiyun', default=user_input.get('caiyun', False)): bool,
         }
         return self.async_show_form(
@@ -85,6 +123,20 @@ class TianqiConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
             description_placeholders={'tip': self.context.pop('last_error', '')},
         )
 
+    def configured_area_ids(self) -> Set[str]:
+        """Area ids of the existing entries, an area in two of them would duplicate its entities and device."""
+        clients = self.hass.data.get(DOMAIN, {}).get('clients', {})
+        area_ids = set()
+        for entry in self._async_current_entries(include_ignore=False):
+            config = {**entry.data, **entry.options}
+            area_ids.update(parse_area_ids(config.get('area_ids')))
+            if (area_id := config.get('area_id')) and area_id != 'auto':
+                area_ids.add(area_id)
+            elif (client := clients.get(entry.entry_id)) and client.station:
+                # the area an `auto` entry resolved to
+                area_ids.add(client.area_id)
+        return area_ids
+
 
 class OptionsFlowHandler(config_entries.OptionsFlow):
     def __init__(self, config_entry: config_entries.ConfigEntry):
@@ -106,6 +158,8 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
                 return self.async_create_entry(title='', data={})
             except Exception as exc:
                 self.context['last_error'] = f'{exc}'
+            finally:
+                await client.unload()
         if not self.context.get('last_error'):
             self.context['last_error'] = '如果想修改城市/区县，请重新添加集成'
         defaults = {
@@ -118,6 +172,14 @@ class OptionsFlowHandler(config_entries.OptionsFlow):
             data_schema=vol.Schema({
                 vol.Required(CONF_DOMAIN, default=defaults.get(CONF_DOMAIN)): str,
                 vol.Optional('caiyun', default=defaults.get('caiyun', False)): bool,
+                vol.Optional('conditional_requests', default=defaults.get('conditional_requests', False)): bool,
+                vol.Optional('adaptive_polling', default=defaults.get('adaptive_polling', False)): bool,
+                vol.Optional('poll_min_scale', default=defaults.get('poll_min_scale', DEFAULT_MIN_SCALE)):
+                    vol.All(vol.Coerce(float), vol.Range(min=0.1, max=1)),
+                vol.Optional('poll_max_scale', default=defaults.get('poll_max_scale', DEFAULT_MAX_SCALE)):
+                    vol.All(vol.Coerce(float), vol.Range(min=1, max=60)),
+                vol.Optional('observe_hours', default=defaults.get('observe_hours', DEFAULT_OBSERVE_HOURS)):
+                    vol.All(vol.Coerce(int), vol.Range(min=24, max=720)),
             }),
             description_placeholders={'tip': self.context.pop('last_error', '')},
         )
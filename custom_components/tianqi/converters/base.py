@@ -5,6 +5,8 @@ import re
 if TYPE_CHECKING:
     from .. import TianqiClient as Client
 
+ALARM_TITLE = re.compile(r'.+发布的?(.+预警)')
+
 
 @dataclass
 class Converter:
@@ -17,6 +19,7 @@ class Converter:
     enabled: Optional[bool] = True  # support: True, False, None (lazy setup)
     poll: bool = False  # hass should_poll
     ignore_prop: bool = False
+    source: Optional[str] = None  # endpoint whose payload is decoded, None for any
 
     # don't init with dataclass because no type:
     childs = None  # set or dict? of children attributes
@@ -71,27 +74,31 @@ class WindSpeedSensorConv(NumberSensorConv):
         'wind_speed_and_unit',
     }
 
+    ignore_prop: bool = True
+    source: Optional[str] = 'summary'
+
     def decode(self, client: "Client", payload: dict, value: Any):
-        super().decode(client, payload, value)
-        dataSK = client.data.get('dataSK') or {}
+        super().decode(client, payload, value.get(self.prop))
         payload.update({
-            'wind_direction': dataSK.get('WD'),
-            'wind_direction_code': dataSK.get('wde'),
-            'wind_level': dataSK.get('WS'),
-            'wind_speed_and_unit': dataSK.get('wse'),
+            'wind_direction': value.get('WD'),
+            'wind_direction_code': value.get('wde'),
+            'wind_level': value.get('WS'),
+            'wind_speed_and_unit': value.get('wse'),
         })
 
 @dataclass
 class ForecastMinutelySensorConv(SensorConv):
     attr: str = 'forecast_minutely'
     prop: Optional[str] = 'msg'
+    ignore_prop: bool = True
+    source: Optional[str] = 'minutely'
     option = {
         'icon': 'mdi:tooltip',
         'payload_attrs': True,
     }
 
     def decode(self, client: "Client", payload: dict, value: Any):
-        minutely = client.data.get('minutely') or {}
+        minutely = value or {}
         times = minutely.get('times', [])
         values = minutely.get('values', [])
         minutes = dict(zip(times, values)) if len(times) == len(values) else {}
@@ -101,11 +108,51 @@ class ForecastMinutelySensorConv(SensorConv):
         })
 
 
+@dataclass
+class UpstreamSensorConv(SensorConv):
+    """Worst circuit state of the upstream hosts of a client."""
+    attr: str = 'upstream'
+    ignore_prop: bool = True
+    source: Optional[str] = 'upstream'
+    childs = {
+        'hosts',
+        'stale_endpoints',
+    }
+
+    def decode(self, client: "Client", payload: dict, value: Any):
+        payload.update({
+            'upstream': value.get('state'),
+            'hosts': value.get('hosts'),
+            'stale_endpoints': value.get('stale'),
+        })
+
+
+@dataclass
+class RequestStatsSensorConv(SensorConv):
+    """Slowest p95 request time of the endpoints, with a summary of each as attributes."""
+    attr: str = 'request_latency'
+    ignore_prop: bool = True
+    source: Optional[str] = 'stats'
+    enabled: Optional[bool] = False
+    childs = {
+        'endpoints',
+    }
+
+    def decode(self, client: "Client", payload: dict, value: Any):
+        endpoints = value.get('endpoints') or {}
+        p95 = [v['total_ms_p95'] for v in endpoints.values() if v.get('total_ms_p95') is not None]
+        payload.update({
+            'request_latency': max(p95) if p95 else None,
+            'endpoints': endpoints,
+        })
+
+
 @dataclass
 class AlarmsBinarySensorConv(Converter):
     attr: str = 'warning'
     prop: Optional[str] = 'alarms'
     domain: Optional[str] = 'binary_sensor'
+    source: Optional[str] = 'alarms'
     option = {
         'device_class': 'problem',
     }
@@ -119,10 +166,10 @@ class AlarmsBinarySensorConv(Converter):
         code = None
         titles = []
         alarms = []
-        for v in client.data.get(self.prop) or []:
+        for v in value or []:
             code = f'{v.get("w4")}{v.get("w6")}'
             title = v.get('w13', '')
-            titles.append(re.sub(r'.+发布的?(.+预警)', r'\1', title))
+            titles.append(ALARM_TITLE.sub(r'\1', title))
             alarms.append({
                 'title': title,
                 'description': v.get('w9', ''),
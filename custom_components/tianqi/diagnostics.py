@@ -0,0 +1,33 @@
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant
+
+from . import DOMAIN
+
+TO_REDACT = {'lat', 'lng', 'latitude', 'longitude'}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict:
+    data = {
+        'config': async_redact_data({**entry.data, **entry.options}, TO_REDACT),
+    }
+    clients = [
+        client for client in hass.data.get(DOMAIN, {}).get('clients', {}).values()
+        if client.entry_id == entry.entry_id
+    ]
+    if len(clients) == 1:
+        client = clients[0]
+        data['station'] = async_redact_data(client.station.data if client.station else {}, TO_REDACT)
+        data.update(client.stats_report())
+    elif clients:
+        # multi-area entry, the shared state once and the requests and client part per area
+        data.update(clients[0].stats_report())
+        data['requests'] = {}
+        data['client'] = {}
+        data['stations'] = {}
+        for client in clients:
+            report = client.stats_report()
+            data['requests'][client.key] = report['requests']
+            data['client'][client.key] = report['client']
+            data['stations'][client.key] = async_redact_data(client.station.data if client.station else {}, TO_REDACT)
+    return data
@@ -0,0 +1,180 @@
+import logging
+
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from .extractor import JsVars
+from .records import DailyRow, HourlySeries, ObserveHour, load_observe, wall_seconds
+from .retry import DEFAULT_POLICY, RetryPolicy
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class Field:
+    """Copy `var` (None for a JSON body) at the dotted `path` into the result under `key`."""
+
+    __slots__ = ('key', 'var', 'path', 'default')
+
+    def __init__(self, key, var=None, path='', default: Callable[[], Any] = dict):
+        self.key = key
+        self.var = var
+        self.path = tuple(p for p in path.split('.') if p)
+        self.default = default
+
+    def extract(self, value):
+        for k in self.path:
+            value = (value or {}).get(k)
+        return value or self.default()
+
+
+@dataclass(frozen=True)
+class EndpointSpec:
+    name: str
+    path: str  # formatted with area_id
+    interval: timedelta
+    node: str = 'd1'
+    variables: Optional[JsVars] = None  # None for JSON APIs
+    fields: Tuple[Field, ...] = ()
+    post: Optional[Callable[[dict, dict, str], None]] = None  # (result, values, api)
+    params: Optional[Callable[[Any], dict]] = None  # query params from the client
+    payload: Optional[Callable[[dict], Optional[dict]]] = None  # what of a result is decoded for entities
+    refresh_entities: bool = False
+    keep_buster: bool = True  # False if conditional requests may drop the cache-buster
+    restore: Optional[Callable[[dict], None]] = None  # revive values of a cached result
+    version: Optional[Callable[[dict], Any]] = None  # upstream freshness of a result, the whole result if None
+    storm: bool = False  # poll faster while alarms are active or rain is coming
+    retry: RetryPolicy = DEFAULT_POLICY
+
+    def url_path(self, area_id):
+        return self.path.format(area_id=area_id)
+
+    def complete(self, values: dict) -> bool:
+        """Whether the fetched values hold one of the variables of the page, or a non-empty JSON body."""
+        if self.variables:
+            return any(values.get(key) is not None for key in self.variables.keys)
+        return bool(values.get(None))
+
+    def build(self, result: dict, values: dict, api=None):
+        for field in self.fields:
+            if field.var in values:
+                result[field.key] = field.extract(values[field.var])
+        if self.post:
+            self.post(result, values, api)
+        return result
+
+
+def load_hourlies(result: dict, values=None, api=None):
+    """Convert the hourly rows, or their cached columns, once into a HourlySeries."""
+    if (rows := result.get('hourlies')) is not None:
+        result['hourlies'] = HourlySeries.load(rows)
+
+
+def load_dailies(result: dict, values=None, api=None):
+    """Convert the daily items, or their cached dicts, once into DailyRows."""
+    if (rows := result.get('dailies')) is not None:
+        result['dailies'] = DailyRow.load_rows(rows)
+
+
+def load_observes(result: dict, values=None, api=None):
+    if (hours := result.get('observe')) is not None:
+        result['observe'] = load_observe(hours)
+
+
+def parse_observe(result: dict, values: dict, api=None):
+    """Key the last 24 hours of observations by their wall-clock seconds."""
+    if 'observe24h_data' not in values:
+        return
+    result['observe_error'] = None
+    dat = {}
+    rdt = (values['observe24h_data'] or {}).get('od') or {}
+    lst = rdt.get('od2') or []
+    lst.reverse()
+    try:
+        stm = datetime.strptime(rdt.get('od0', ''), '%Y%m%d%H%M')
+    except ValueError as exc:
+        result['observe_error'] = {
+            'error': str(exc),
+            'api': api,
+            'data': rdt,
+        }
+        _LOGGER.warning('Update observe failed: %s', result['observe_error'])
+        return
+    sec = wall_seconds(stm.replace(minute=0))
+    for v in lst:
+        try:
+            # hours only go forward from od0, crossing midnight when the hour of day drops
+            tim = sec - sec % 86400 + int(v.get('od21', 0)) * 3600
+            if tim < sec:
+                tim += 86400
+            sec = tim
+            dat[tim] = ObserveHour.from_item(tim, v)
+        except (TypeError, ValueError):
+            pass
+    if dat:
+        result['observe'] = dat
+
+
+ENDPOINTS: Dict[str, EndpointSpec] = {
+    spec.name: spec
+    for spec in [
+        EndpointSpec(
+            'alarms', 'dingzhi/{area_id}.html', timedelta(minutes=5),
+            variables=JsVars({'alarms': r'var alarmDZ\w*\s*=\s*'}),
+            fields=(Field('alarms', 'alarms', '.w', list),),
+            payload=lambda result: {'alarms': result['alarms']} if 'alarms' in result else None,
+            storm=True,
+        ),
+        EndpointSpec(
+            'summary', 'weather_index/{area_id}.html', timedelta(seconds=60),
+            variables=JsVars({'dataSK': r'dataSK\s*=\s*', 'dataZS': r'dataZS\s*=\s*'}),
+            fields=(
+                Field('dataSK', 'dataSK'),
+                Field('dataZS', 'dataZS', '.zs'),
+            ),
+            payload=lambda result: result.get('dataSK'),
+            refresh_entities=True,
+            retry=RetryPolicy(retries=2, cap=10),
+            version=lambda result: (
+                (result.get('dataSK') or {}).get('date'),
+                (result.get('dataSK') or {}).get('time'),
+            ) if result.get('dataSK') else None,
+            storm=True,
+        ),
+        EndpointSpec(
+            'dailies', 'weixinfc/{area_id}.html', timedelta(minutes=60),
+            variables=JsVars({'fc': r'fc\s*=\s*'}),
+            fields=(Field('dailies', 'fc', '.f', list),),
+            post=load_dailies,
+            keep_buster=False,
+            retry=RetryPolicy(retries=4),
+            restore=load_dailies,
+        ),
+        EndpointSpec(
+            'observe', 'weather/{area_id}.shtml', timedelta(minutes=30), node='www',
+            variables=JsVars({'observe24h_data': r'observe24h_data\s*=\s*'}),
+            post=parse_observe,
+            restore=load_observes,
+        ),
+        EndpointSpec(
+            'hourlies', 'wap_180h/{area_id}.html', timedelta(minutes=30),
+            variables=JsVars({'fc180': r'fc180\s*=\s*'}),
+            fields=(Field('hourlies', 'fc180', '.jh', list),),
+            post=load_hourlies,
+            keep_buster=False,
+            retry=RetryPolicy(retries=4),
+            restore=load_hourlies,
+        ),
+        EndpointSpec(
+            'minutely', 'mpf_v3/webgis/minute', timedelta(minutes=5), node='mpf',
+            fields=(Field('minutely'),),
+            params=lambda client: {
+                'lat': client.station.latitude,
+                'lon': client.station.longitude,
+            },
+            payload=lambda result: result.get('minutely'),
+            retry=RetryPolicy(retries=2, cap=10),
+            storm=True,
+        ),
+    ]
+}
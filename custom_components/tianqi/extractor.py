@@ -0,0 +1,186 @@
+import hashlib
+import re
+import time
+
+from typing import Any, AsyncIterable, Callable, Dict, Optional
+
+from . import codec
+
+CHUNK_SIZE = 16384
+MARKER_TAIL = 256  # bytes kept between chunks so a marker split across them is still found
+
+WORD_BYTES = re.compile(rb'[\w$]')
+# from where the bracket scan resumes: text and plain string literals in one go, then an opening bracket (1),
+# a closing one (2), a string literal with escapes or brackets in it (3), closed if (4), or the end of the buffer
+OBJECT_TOKEN = re.compile(
+    rb'[^"{}\[\]]*(?:"[^"\\{}\[\]]*"[^"{}\[\]]*)*'
+    rb'(?:([{\[])|([}\]])|("[^"\\]*(?:\\.[^"\\]*)*)(")?)?',
+    re.DOTALL,
+)
+OPEN, CLOSE, STRING, CLOSED_STRING = 1, 2, 3, 4
+
+
+class JsVars:
+    """Compiled lookup of `name = {...}` assignments embedded in a page.
+
+    `markers` maps a result key to a regex matching the assignment up to, but not
+    including, the opening brace. Patterns should start with a literal so the regex
+    engine can scan for it quickly; they only match at a word boundary.
+    """
+
+    def __init__(self, markers: Dict[str, str], loads: Callable[[bytes], Any] = codec.loads):
+        self.keys = tuple(markers)
+        self.patterns = tuple(
+            (key, re.compile(f'{pattern}(?={{)'.encode()))
+            for key, pattern in markers.items()
+        )
+        self.loads = loads
+
+    def search(self, buf, pos, skip=()):
+        """Earliest marker in buf from pos, as (key, end of the marker)."""
+        found = None
+        for key, pattern in self.patterns:
+            if key in skip:
+                continue
+            start = pos
+            while match := pattern.search(buf, start):
+                if match.start() and WORD_BYTES.match(buf, match.start() - 1):
+                    start = match.start() + 1
+                    continue
+                if not found or match.start() < found[0]:
+                    found = (match.start(), key, match.end())
+                break
+        return found and found[1:]
+
+    def scanner(self):
+        return JsVarScanner(self)
+
+    def extract(self, body: bytes) -> dict:
+        scanner = self.scanner()
+        scanner.feed(body)
+        return scanner.results
+
+    async def extract_stream(self, chunks: AsyncIterable[bytes], digest: Optional[str] = None) -> "JsVarScanner":
+        """Feed chunks until every variable is found, the caller decides what to do with the rest of the stream.
+
+        With a `digest`, the bytes read are hashed as they come in. A non-empty one is the digest of a previous
+        scan: the page is first read as far as that scan went, and if those bytes are the same nothing is
+        scanned and the scanner is `unchanged`.
+        """
+        scanner = self.scanner()
+        if digest is None:
+            async for chunk in chunks:
+                if scanner.feed(chunk):
+                    break
+            return scanner
+        size, _, known = digest.partition(':')
+        size = int(size) if known else 0
+        sha1 = hashlib.sha1()
+        held = []
+        read = 0
+        async for chunk in chunks:
+            held.append(chunk)
+            if read + len(chunk) < size:
+                sha1.update(chunk)
+                read += len(chunk)
+                continue
+            cut = size - read
+            sha1.update(chunk[:cut])
+            read += len(chunk)
+            if size and sha1.hexdigest() == known:
+                scanner.unchanged = True
+                scanner.bytes_read = read
+                return scanner
+            sha1.update(chunk[cut:])
+            break
+        for chunk in held:
+            if scanner.feed(chunk):
+                break
+        else:
+            async for chunk in chunks:
+                sha1.update(chunk)
+                read += len(chunk)
+                if scanner.feed(chunk):
+                    break
+        scanner.bytes_read = read
+        scanner.digest = f'{read}:{sha1.hexdigest()}'
+        return scanner
+
+
+class JsVarScanner:
+    def __init__(self, spec: JsVars):
+        self.spec = spec
+        self.results = {}
+        self.raw = {}  # key: bytes of the extracted object
+        self.bytes_read = 0
+        self.digest = None  # 'size:sha1' of the bytes read, if asked for
+        self.unchanged = False  # same bytes as the scan of the digest given, nothing was scanned
+        self.parse_time = 0.0  # seconds spent scanning and decoding
+        self._buf = bytearray()
+        self._pos = 0  # where to look for the next marker
+        self._key: Optional[str] = None  # variable being captured, its brace is at the start of the buffer
+        self._end_pos = 0  # where the bracket scan resumes
+        self._depth = 0  # brackets open at _end_pos
+
+    @property
+    def done(self):
+        return len(self.results) >= len(self.spec.keys)
+
+    def feed(self, chunk: bytes) -> bool:
+        start = time.perf_counter()
+        self.bytes_read += len(chunk)
+        self._buf += chunk
+        while not self.done:
+            if self._key is None and not self._find_marker():
+                break
+            if not self._find_end():
+                break
+        if self.done:
+            self._buf = bytearray()
+        self.parse_time += time.perf_counter() - start
+        return self.done
+
+    def _find_marker(self):
+        buf = self._buf
+        if found := self.spec.search(buf, self._pos, self.results):
+            self._key, start = found
+            del buf[:start]
+            self._end_pos = 0
+            self._depth = 0
+            return True
+        # nothing found, drop what was scanned but keep a tail for split markers
+        keep = max(self._pos, len(buf) - MARKER_TAIL)
+        del buf[:keep]
+        self._pos = 0
+        return False
+
+    def _find_end(self):
+        """Scan from the opening brace until its bracket closes, skipping string literals, one pass across chunks."""
+        buf = self._buf
+        depth = self._depth
+        pos = self._end_pos
+        while True:
+            match = OBJECT_TOKEN.match(buf, pos)
+            token = match.lastindex
+            if token == OPEN:
+                depth += 1
+            elif token == CLOSE:
+                depth -= 1
+                if not depth:
+                    break
+            elif token != CLOSED_STRING:
+                # the end of the buffer, or of a string that goes on in the next chunk and is scanned again from its quote
+                self._end_pos = match.start(STRING) if token == STRING else match.end()
+                self._depth = depth
+                return False
+            pos = match.end()
+        end = match.end()
+        raw = buf[:end]
+        try:
+            self.results[self._key] = self.spec.loads(raw)
+            self.raw[self._key] = raw
+        except ValueError:
+            pass  # not a literal the codec reads, a later assignment may still be
+        self._key = None
+        self._pos = end
+        return True
@@ -0,0 +1,221 @@
+from array import array
+from bisect import bisect_left
+from collections import deque
+from typing import Iterable, Iterator, Optional
+
+from .records import NAN, ObserveHour
+
+DEFAULT_OBSERVE_HOURS = 72
+RAIN_WINDOWS = (3, 6, 12, 24)  # hours of the rain sums
+ROLLING_HOURS = 24  # hours of the min, max and mean
+
+
+class RollingWindow:
+    """Min, max and mean of one column over the hours within `hours` of the newest one.
+
+    Monotonic deques keep the min and max candidates and a running sum the mean,
+    every hour is added and evicted once, so a push is O(1) amortized.
+    """
+
+    __slots__ = ('span', 'values', 'mins', 'maxs', 'total')
+
+    def __init__(self, hours=ROLLING_HOURS):
+        self.span = hours * 3600
+        self.values = deque()  # (time, value)
+        self.mins = deque()  # increasing values, the min first
+        self.maxs = deque()  # decreasing values, the max first
+        self.total = 0.0
+
+    def push(self, tim: int, value: float):
+        cutoff = tim - self.span
+        while self.values and self.values[0][0] <= cutoff:
+            self.total -= self.values.popleft()[1]
+        if not self.values:
+            # no float drift left over from evicted values
+            self.total = 0.0
+        while self.mins and self.mins[0][0] <= cutoff:
+            self.mins.popleft()
+        while self.maxs and self.maxs[0][0] <= cutoff:
+            self.maxs.popleft()
+        if value != value:
+            return
+        self.values.append((tim, value))
+        self.total += value
+        while self.mins and self.mins[-1][1] >= value:
+            self.mins.pop()
+        self.mins.append((tim, value))
+        while self.maxs and self.maxs[-1][1] <= value:
+            self.maxs.pop()
+        self.maxs.append((tim, value))
+
+    @property
+    def min(self) -> Optional[float]:
+        return self.mins[0][1] if self.mins else None
+
+    @property
+    def max(self) -> Optional[float]:
+        return self.maxs[0][1] if self.maxs else None
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total / len(self.values) if self.values else None
+
+
+class ObserveHistory:
+    """Observed hours of one area in fixed-capacity ring buffers, oldest first.
+
+    Hours newer than the last one are appended, the oldest drop out once the capacity is reached.
+    Rain is also kept as a running total, so the rain of any range is the difference of two totals.
+    """
+
+    __slots__ = (
+        'capacity', 'time', 'temp', 'humi', 'rain', 'wind_level', 'wind', 'rain_total', 'start', 'size', 'version',
+        'rolling',
+    )
+
+    COLUMNS = ('temp', 'humi', 'rain', 'wind_level')
+    # column: (name in the aggregates, statistics)
+    ROLLING = {
+        'temp': ('temperature', ('min', 'max', 'mean')),
+        'humi': ('humidity', ('min', 'max', 'mean')),
+        'wind_level': ('wind_level', ('max',)),
+    }
+
+    def __init__(self, capacity=DEFAULT_OBSERVE_HOURS):
+        self.capacity = capacity = max(1, int(capacity))
+        self.time = array('q', [0]) * capacity  # wall-clock seconds
+        self.temp = array('d', [NAN]) * capacity
+        self.humi = array('d', [NAN]) * capacity
+        self.rain = array('d', [0.0]) * capacity
+        self.wind_level = array('d', [0.0]) * capacity
+        self.wind = [None] * capacity
+        self.rain_total = array('d', [0.0]) * capacity  # rain of every hour appended so far, up to this one
+        self.start = 0  # slot of the oldest hour
+        self.size = 0
+        self.version = 0  # bumped whenever hours are added
+        self.rolling = {col: RollingWindow() for col in self.ROLLING}
+
+    def _slot(self, idx: int) -> int:
+        return (self.start + idx) % self.capacity
+
+    def __len__(self):
+        return self.size
+
+    @property
+    def last_time(self) -> Optional[int]:
+        return self.time[self._slot(self.size - 1)] if self.size else None
+
+    def append(self, hour: ObserveHour) -> bool:
+        if self.size and hour.time <= self.last_time:
+            return False
+        total = self.rain_total[self._slot(self.size - 1)] if self.size else 0.0
+        if self.size < self.capacity:
+            slot = self._slot(self.size)
+            self.size += 1
+        else:
+            slot = self.start
+            self.start = (self.start + 1) % self.capacity
+        self.time[slot] = hour.time
+        self.temp[slot] = hour.temp
+        self.humi[slot] = hour.humi
+        self.rain[slot] = hour.rain
+        self.wind_level[slot] = hour.wind_level
+        self.wind[slot] = hour.wind
+        self.rain_total[slot] = total + hour.rain
+        for col, window in self.rolling.items():
+            window.push(hour.time, getattr(hour, col))
+        return True
+
+    def merge(self, hours: Iterable[ObserveHour]) -> int:
+        """Append the hours newer than the last one, returning how many were added."""
+        added = 0
+        for hour in sorted(hours, key=lambda h: h.time):
+            added += self.append(hour)
+        if added:
+            self.version += 1
+        return added
+
+    def index(self, seconds: int) -> int:
+        """Position, oldest first, of the first hour at or after the wall-clock seconds."""
+        if self.size < self.capacity or not self.start:
+            return bisect_left(self.time, seconds, self.start, self.start + self.size) - self.start
+        # wrapped: the oldest hours from start to the end of the arrays, then the newest from 0
+        if seconds <= self.time[-1]:
+            return bisect_left(self.time, seconds, self.start) - self.start
+        return self.capacity - self.start + bisect_left(self.time, seconds, 0, self.start)
+
+    def get(self, seconds: int) -> Optional[ObserveHour]:
+        idx = self.index(seconds)
+        if idx >= self.size or self.time[slot := self._slot(idx)] != seconds:
+            return None
+        return self._hour(slot)
+
+    def _hour(self, slot) -> ObserveHour:
+        return ObserveHour(
+            self.time[slot], self.temp[slot], self.humi[slot], rain=self.rain[slot],
+            wind=self.wind[slot], wind_level=self.wind_level[slot],
+        )
+
+    def hours(self, start=0, stop=None) -> Iterator[ObserveHour]:
+        """Hours by position, oldest first."""
+        for idx in range(*slice(start, stop).indices(self.size)):
+            yield self._hour(self._slot(idx))
+
+    def _total_before(self, idx: int) -> float:
+        if idx <= 0:
+            first = self._slot(0)
+            return self.rain_total[first] - self.rain[first]
+        return self.rain_total[self._slot(idx - 1)]
+
+    def rain_between(self, start: int, end: int) -> float:
+        """Rain of the hours in [start, end) wall-clock seconds."""
+        if not self.size:
+            return 0.0
+        return self._total_before(self.index(end)) - self._total_before(self.index(start))
+
+    def rain_last(self, hours: int) -> float:
+        """Rain of the last hours, counted back from the latest observed one."""
+        if not self.size:
+            return 0.0
+        end = self.last_time + 3600
+        return self.rain_between(end - hours * 3600, end)
+
+    def aggregates(self) -> dict:
+        """Rain sums and rolling statistics counted back from the newest hour, for the sensors."""
+        if not self.size:
+            return {}
+        data = {f'rain_{hours}h': self.rain_last(hours) for hours in RAIN_WINDOWS}
+        for col, (name, stats) in self.ROLLING.items():
+            for stat in stats:
+                data[f'{name}_{stat}_{ROLLING_HOURS}h'] = getattr(self.rolling[col], stat)
+        return data
+
+    def as_dict(self) -> dict:
+        """JSON friendly columns oldest first, for the cache."""
+        order = [self._slot(idx) for idx in range(self.size)]
+        return {
+            'time': [self.time[s] for s in order],
+            **{k: [getattr(self, k)[s] for s in order] for k in self.COLUMNS},
+            'wind': [self.wind[s] for s in order],
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, capacity=DEFAULT_OBSERVE_HOURS):
+        """History from cached columns, keeping the newest hours that fit in the capacity."""
+        history = cls(capacity)
+        times = data.get('time') or []
+        cols = {k: data.get(k) or [] for k in (*cls.COLUMNS, 'wind')}
+        hours = []
+        for idx, tim in enumerate(times):
+            # NaN is cached as null
+            val = {k: col[idx] if idx < len(col) else None for k, col in cols.items()}
+            hours.append(ObserveHour(
+                tim,
+                NAN if val['temp'] is None else val['temp'],
+                NAN if val['humi'] is None else val['humi'],
+                rain=val['rain'] or 0.0,
+                wind=val['wind'],
+                wind_level=val['wind_level'] or 0.0,
+            ))
+        history.merge(hours[-history.capacity:])
+        return history
@@ -0,0 +1,337 @@
+import calendar
+
+from array import array
+from bisect import bisect_left
+from datetime import datetime, timezone, tzinfo
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+NAN = float('nan')
+
+
+def wall_seconds(tim: datetime) -> int:
+    """Wall-clock time as seconds since the epoch, ignoring its timezone."""
+    return calendar.timegm(tim.timetuple())
+
+
+def wall_datetime(seconds: int, tz: Optional[tzinfo] = None) -> datetime:
+    return datetime.fromtimestamp(seconds, timezone.utc).replace(tzinfo=tz)
+
+
+def _float(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return NAN
+
+
+def _int(value, default=-1):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return default
+
+
+def _text(value) -> str:
+    """Number as the upstream sends it, empty if missing."""
+    return '' if value is None or value != value else f'{value:g}'
+
+
+def _code(value: int) -> str:
+    return '' if value < 0 else f'{value:02d}'
+
+
+class StationInfo:
+    """Station of an area, only the fields the integration reads from the stationinfo API."""
+
+    __slots__ = ('area_id', 'area_name', 'area_code', 'latitude', 'longitude')
+
+    # attribute: upstream key
+    KEYS = {
+        'area_id': 'areaid',
+        'area_name': 'namecn',
+        'area_code': 'nameen',
+        'latitude': 'lat',
+        'longitude': 'lng',
+    }
+
+    def __init__(self, data: dict):
+        for attr, key in self.KEYS.items():
+            setattr(self, attr, data.get(key))
+
+    @property
+    def data(self) -> dict:
+        """Upstream shaped dict, for the cache and diagnostics."""
+        return {key: val for attr, key in self.KEYS.items() if (val := getattr(self, attr)) is not None}
+
+    def as_dict(self) -> dict:
+        return self.data
+
+    def __repr__(self):
+        return f'StationInfo({self.data})'
+
+
+class ObserveHour:
+    """One hour of the observe24h page, `time` as wall-clock seconds."""
+
+    __slots__ = ('time', 'temp', 'humi', 'rain', 'wind', 'wind_level', 'wind_angel', 'aqi')
+
+    def __init__(self, time: int, temp: float, humi: float, rain=0.0, wind=None, wind_level=0.0, wind_angel=0.0, aqi=None):
+        self.time = time
+        self.temp = temp
+        self.humi = humi
+        self.rain = rain
+        self.wind = wind
+        self.wind_level = wind_level
+        self.wind_angel = wind_angel
+        self.aqi = aqi
+
+    @classmethod
+    def from_item(cls, time: int, item: dict):
+        """Parse an `od2` row, raising TypeError or ValueError without temperature or humidity."""
+        return cls(
+            time,
+            float(item.get('od22')),
+            float(item.get('od27')),
+            rain=float(item.get('od26') or 0),
+            wind=item.get('od24'),
+            wind_level=float(item.get('od25') or 0),
+            wind_angel=float(item.get('od23') or 0),
+            aqi=item.get('od28'),
+        )
+
+    @classmethod
+    def from_dict(cls, time: int, data: dict):
+        return cls(time, **{k: data[k] for k in cls.__slots__[1:] if k in data})
+
+    def as_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def as_item(self) -> dict:
+        """The hour as it was returned by the update_observe service, an `od2` row plus the parsed values."""
+        return {
+            'od21': wall_datetime(self.time).strftime('%H'),
+            'od22': _text(self.temp),
+            'od23': _text(self.wind_angel),
+            'od24': self.wind,
+            'od25': _text(self.wind_level),
+            'od26': _text(self.rain),
+            'od27': _text(self.humi),
+            'od28': self.aqi,
+            **{k: getattr(self, k) for k in self.__slots__[1:]},
+        }
+
+    def __eq__(self, other):
+        if not isinstance(other, ObserveHour):
+            return NotImplemented
+        return all(getattr(self, k) == getattr(other, k) for k in self.__slots__)
+
+    def __repr__(self):
+        return f'ObserveHour({self.as_dict()})'
+
+
+def load_observe(value: dict) -> dict:
+    """Hours keyed by wall-clock seconds, from parsed hours or the cached dicts, old cached keys being `%Y%m%d%H%M`."""
+    hours = {}
+    for key, val in (value or {}).items():
+        if isinstance(val, ObserveHour):
+            hours[val.time] = val
+            continue
+        key = f'{key}'
+        try:
+            if len(key) == 12:
+                tim = wall_seconds(datetime(int(key[0:4]), int(key[4:6]), int(key[6:8]), int(key[8:10]), int(key[10:12])))
+            else:
+                tim = int(key)
+            hours[tim] = ObserveHour.from_dict(tim, val)
+        except (TypeError, ValueError):
+            continue
+    return hours
+
+
+class DailyRow:
+    """One day of the daily forecast, NaN for missing values and -1 for an unknown condition."""
+
+    __slots__ = ('month', 'day', 'code', 'temperature', 'templow', 'humidity', 'wind_bearing')
+    FLOATS = ('temperature', 'templow', 'humidity')
+
+    def __init__(self, month: int, day: int, code=-1, temperature=NAN, templow=NAN, humidity=NAN, wind_bearing=None):
+        self.month = month
+        self.day = day
+        self.code = code
+        self.temperature = temperature
+        self.templow = templow
+        self.humidity = humidity
+        self.wind_bearing = wind_bearing
+
+    @classmethod
+    def from_item(cls, item: dict):
+        """Parse a `fc.f` row, None without a valid `fi` date."""
+        month, _, day = f'{item.get("fi") or ""}'.partition('/')
+        month, day = _int(month), _int(day)
+        if not (1 <= month <= 12 and 1 <= day <= 31):
+            return None
+        return cls(
+            month, day,
+            code=_int(item.get('fa')),
+            temperature=_float(item.get('fc')),
+            templow=_float(item.get('fd')),
+            humidity=_float(item.get('fn')),
+            wind_bearing=item.get('fe'),
+        )
+
+    @classmethod
+    def load_rows(cls, rows) -> List["DailyRow"]:
+        """Rows from the upstream items, the cached dicts or rows."""
+        lst = []
+        for item in rows or []:
+            if isinstance(item, dict) and 'month' in item:
+                # NaN is cached as null
+                item = cls(**{k: NAN if item[k] is None and k in cls.FLOATS else item[k] for k in cls.__slots__ if k in item})
+            elif isinstance(item, dict):
+                item = cls.from_item(item)
+            if item is not None:
+                lst.append(item)
+        return lst
+
+    def as_dict(self) -> dict:
+        return {k: getattr(self, k) for k in self.__slots__}
+
+    def as_item(self) -> dict:
+        """The day as a `fc.f` row, as the update services returned it, with only the keys the row keeps."""
+        return {
+            'fa': _code(self.code),
+            'fc': _text(self.temperature),
+            'fd': _text(self.templow),
+            'fe': self.wind_bearing,
+            'fi': f'{self.month}/{self.day}',
+            'fn': _text(self.humidity),
+        }
+
+    def value(self, attr) -> Optional[float]:
+        """Float attribute, None if missing."""
+        val = getattr(self, attr)
+        return val if val == val else None
+
+    def __eq__(self, other):
+        if not isinstance(other, DailyRow):
+            return NotImplemented
+        # NaN never equals itself
+        return all(
+            a == b or a != a and b != b
+            for a, b in zip((getattr(self, k) for k in self.__slots__), (getattr(other, k) for k in self.__slots__))
+        )
+
+    def __repr__(self):
+        return f'DailyRow({self.as_dict()})'
+
+
+class HourlyRow(NamedTuple):
+    time: int  # wall-clock seconds
+    code: int
+    temperature: Optional[float]
+    humidity: Optional[float]
+    pressure: Optional[float]
+    wind_speed: Optional[float]
+
+
+class HourlySeries:
+    """Hourly forecast as parallel typed arrays ordered by time, NaN for missing values.
+
+    Times are the wall-clock time of the upstream (`jf`) as seconds since the epoch,
+    codes are the numeric part of the condition (`ja`), -1 if unknown.
+    """
+
+    __slots__ = ('time', 'code', 'temperature', 'humidity', 'pressure', 'wind_speed')
+
+    # column: upstream key
+    COLUMNS = {
+        'temperature': 'jb',
+        'humidity': 'je',
+        'pressure': 'jj',
+        'wind_speed': 'jg',
+    }
+
+    def __init__(self, time: Iterable[int] = (), code: Iterable[int] = (), temperature: Iterable[float] = (),
+                 humidity: Iterable[float] = (), pressure: Iterable[float] = (), wind_speed: Iterable[float] = ()):
+        self.time = array('q', time)
+        self.code = array('h', code)
+        self.temperature = array('d', temperature)
+        self.humidity = array('d', humidity)
+        self.pressure = array('d', pressure)
+        self.wind_speed = array('d', wind_speed)
+
+    @classmethod
+    def from_rows(cls, rows: list):
+        """Parse the `jh` rows of the upstream, dropping the ones without a valid time."""
+        parsed = []
+        for item in rows or []:
+            ymd = item.get('jf') or ''
+            try:
+                tim = datetime(int(ymd[0:4]), int(ymd[4:6]), int(ymd[6:8]), int(ymd[8:10]), _int(ymd[10:12], 0))
+            except ValueError:
+                continue
+            parsed.append((
+                wall_seconds(tim),
+                _int(item.get('ja')),
+                *(_float(item.get(key)) for key in cls.COLUMNS.values()),
+            ))
+        if any(a[0] > b[0] for a, b in zip(parsed, parsed[1:])):
+            parsed.sort(key=lambda row: row[0])
+        return cls(*zip(*parsed)) if parsed else cls()
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        cols = {k: data.get(k) or () for k in cls.__slots__}
+        for k in cls.COLUMNS:
+            # NaN is cached as null
+            cols[k] = [NAN if v is None else v for v in cols[k]]
+        return cls(**cols)
+
+    @classmethod
+    def load(cls, value):
+        """Series from the upstream rows, a cached dict or a series."""
+        if isinstance(value, cls):
+            return value
+        if isinstance(value, dict):
+            return cls.from_dict(value)
+        return cls.from_rows(value)
+
+    def as_dict(self) -> dict:
+        """JSON friendly columns, for the cache and service responses."""
+        return {k: getattr(self, k).tolist() for k in self.__slots__}
+
+    def items(self) -> List[dict]:
+        """The hours as `jh` rows, as the update services returned them, with only the keys the series keeps."""
+        return [
+            {
+                'ja': _code(code),
+                'jb': _text(temperature),
+                'je': _text(humidity),
+                'jf': wall_datetime(tim).strftime('%Y%m%d%H%M'),
+                'jg': _text(wind_speed),
+                'jj': _text(pressure),
+            }
+            for tim, code, temperature, humidity, pressure, wind_speed in zip(*(getattr(self, k) for k in self.__slots__))
+        ]
+
+    def __len__(self):
+        return len(self.time)
+
+    def __bool__(self):
+        return len(self.time) > 0
+
+    def __eq__(self, other):
+        if not isinstance(other, HourlySeries):
+            return NotImplemented
+        # NaN never equals itself, compare the bytes of the columns
+        return all(getattr(self, k).tobytes() == getattr(other, k).tobytes() for k in self.__slots__)
+
+    def index(self, seconds: int) -> int:
+        """Position of the first hour at or after the wall-clock seconds."""
+        return bisect_left(self.time, seconds)
+
+    def rows(self, start=0, stop=None) -> Iterator[HourlyRow]:
+        """Rows of a slice, None for missing values."""
+        cols = [getattr(self, k)[start:stop] for k in self.__slots__]
+        for tim, code, *values in zip(*cols):
+            yield HourlyRow(tim, code, *(v if v == v else None for v in values))
@@ -0,0 +1,160 @@
+import asyncio
+import logging
+import random
+import time
+
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from typing import Awaitable, Callable, Optional, Tuple, Type
+
+import aiohttp
+
+from .breaker import CircuitBreakers, CircuitOpenError, OPEN
+
+_LOGGER = logging.getLogger(__name__)
+
+
+class MissingPayloadError(Exception):
+    """A successful response without any of the values it was requested for, e.g. a bare page shell."""
+
+
+RETRY_STATUS = frozenset({429, 500, 502, 503, 504})
+RETRY_EXCEPTIONS = (aiohttp.ClientConnectionError, asyncio.TimeoutError, MissingPayloadError)
+BUDGET_CAPACITY = 10  # retries a host may burst
+BUDGET_RATE = 0.2  # retries per second regained by a host
+INTERVAL_SHARE = 0.5  # endpoint retries stop after this share of the poll interval
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    retries: int = 3  # not counting the first attempt
+    base: float = 1.0  # seconds, doubled on each retry before jitter
+    cap: float = 30.0  # longest sleep between attempts
+    max_elapsed: float = 60.0  # give up once this many seconds have passed since the first attempt
+    retry_status: frozenset = RETRY_STATUS
+    exceptions: Tuple[Type[BaseException], ...] = RETRY_EXCEPTIONS
+
+    def backoff(self, attempt: int) -> float:
+        """Full jitter: anywhere between no wait and the exponential ceiling."""
+        return random.uniform(0, min(self.cap, self.base * 2 ** attempt))
+
+    def retryable(self, exc: BaseException) -> bool:
+        if isinstance(exc, aiohttp.ClientResponseError):
+            return exc.status in self.retry_status
+        return isinstance(exc, self.exceptions)
+
+
+DEFAULT_POLICY = RetryPolicy()
+
+
+class AbandonedError(Exception):
+    """The request was given up before reaching the host, e.g. its client was unloaded."""
+
+
+def raise_for_retry(res: aiohttp.ClientResponse, retry_status=RETRY_STATUS):
+    """Turn a response the upstream asks to repeat later into an exception the engine retries."""
+    if res.status not in retry_status:
+        return
+    res.release()
+    raise aiohttp.ClientResponseError(
+        res.request_info, res.history,
+        status=res.status, message=res.reason or '', headers=res.headers,
+    )
+
+
+def retry_after(exc: BaseException) -> Optional[float]:
+    """Seconds from the Retry-After header of a failed response, if any."""
+    headers = getattr(exc, 'headers', None) or {}
+    if not (value := headers.get('Retry-After')):
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class RetryBudget:
+    """Token bucket per host, shared by every client so an upstream blip doesn't multiply into a retry storm."""
+
+    def __init__(self, capacity=BUDGET_CAPACITY, rate=BUDGET_RATE):
+        self.capacity = capacity
+        self.rate = rate
+        self._buckets = {}  # host: (tokens, monotonic time)
+
+    def spend(self, host) -> bool:
+        now = time.monotonic()
+        tokens, last = self._buckets.get(host, (self.capacity, now))
+        tokens = min(self.capacity, tokens + (now - last) * self.rate)
+        if tokens < 1:
+            self._buckets[host] = (tokens, now)
+            return False
+        self._buckets[host] = (tokens - 1, now)
+        return True
+
+    def stats(self):
+        return {host: round(self.tokens(host), 2) for host in self._buckets}
+
+    def tokens(self, host) -> float:
+        tokens, last = self._buckets.get(host, (self.capacity, time.monotonic()))
+        return min(self.capacity, tokens + (time.monotonic() - last) * self.rate)
+
+
+class RetryEngine:
+    def __init__(self, budget: Optional[RetryBudget] = None, breakers: Optional[CircuitBreakers] = None):
+        self.budget = budget or RetryBudget()
+        self.breakers = breakers or CircuitBreakers()
+        self.retries = 0
+        self.exhausted = 0  # retries refused by the budget or the elapsed cap
+
+    async def run(self, factory: Callable[[], Awaitable], host=None, policy: RetryPolicy = DEFAULT_POLICY,
+                  max_elapsed: Optional[float] = None, name=None, on_retry: Optional[Callable[[], None]] = None):
+        """Await factory() until it succeeds or the policy, the elapsed cap, the host budget or its circuit says stop."""
+        limit = policy.max_elapsed if max_elapsed is None else min(policy.max_elapsed, max_elapsed)
+        breaker = self.breakers.get(host) if host else None
+        start = time.monotonic()
+        attempt = 0
+        while True:
+            if breaker and not breaker.allow():
+                raise CircuitOpenError(host)
+            try:
+                result = await factory()
+            except AbandonedError:
+                if breaker:
+                    breaker.abort()
+                raise
+            except Exception as exc:
+                retryable = policy.retryable(exc)
+                if breaker and retryable:
+                    breaker.failure()
+                elif breaker:
+                    # any answer but a failed one shows the host is up
+                    breaker.success()
+                if attempt >= policy.retries or not retryable:
+                    raise
+                if breaker and breaker.state == OPEN:
+                    raise CircuitOpenError(host) from exc
+                delay = policy.backoff(attempt)
+                if (after := retry_after(exc)) is not None:
+                    delay = max(delay, after)
+                if time.monotonic() - start + delay > limit or not self.budget.spend(host):
+                    self.exhausted += 1
+                    _LOGGER.warning('Giving up %s after %s attempts: %s', name or host, attempt + 1, exc)
+                    raise
+                attempt += 1
+                self.retries += 1
+                if on_retry:
+                    on_retry()
+                _LOGGER.warning('Retrying %s in %.1fs (%s/%s): %s', name or host, delay, attempt, policy.retries, exc)
+                await asyncio.sleep(delay)
+                continue
+            except BaseException:
+                if breaker:
+                    breaker.abort()
+                raise
+            if breaker:
+                breaker.success()
+            return result
@@ -0,0 +1,171 @@
+import asyncio
+import heapq
+import logging
+import random
+
+from collections import deque
+from datetime import timedelta
+from typing import Callable, Hashable, Optional
+
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.update_coordinator import DataUpdateCoordinator
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_CONCURRENCY = 4
+DEFAULT_RATE_PER_HOST = 5.0  # requests per second
+JITTER = 0.02
+
+
+class PollCoordinator(DataUpdateCoordinator):
+    """Coordinator refreshed by the shared PollScheduler instead of its own timer."""
+
+    def __init__(self, hass: HomeAssistant, logger, *, poll_interval: timedelta, node='d1', **kwargs):
+        super().__init__(hass, logger, update_interval=None, **kwargs)
+        self.poll_interval = poll_interval
+        self.node = node
+
+
+class PollJob:
+    def __init__(self, key: Hashable, coordinator: DataUpdateCoordinator, interval: float, host=None):
+        self.key = key
+        self.coordinator = coordinator
+        self.interval = interval
+        self.host = host
+        self.next_run = 0.0
+        self.running = False
+        self.lag = 0.0
+
+
+class PollScheduler:
+    """One timer for all (client, endpoint) jobs, with a global concurrency cap and per-host rate limit."""
+
+    def __init__(self, hass: HomeAssistant, concurrency=DEFAULT_CONCURRENCY, rate_per_host=DEFAULT_RATE_PER_HOST):
+        self.hass = hass
+        self._jobs = {}  # key: PollJob
+        self._heap = []  # (next_run, seq, key)
+        self._seq = 0
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._semaphore = asyncio.Semaphore(max(1, int(concurrency)))
+        self._host_next = {}  # host: earliest start time of the next request
+        self.spacing = 1 / rate_per_host if rate_per_host else 0
+        self.waiting = 0
+        self.running = 0
+        self.lags = deque(maxlen=100)
+
+    @property
+    def loop(self):
+        return self.hass.loop
+
+    def add_job(self, key: Hashable, coordinator: DataUpdateCoordinator, interval: timedelta, host=None, delay=None) -> Callable:
+        seconds = interval.total_seconds()
+        job = PollJob(key, coordinator, seconds, host)
+        self._jobs[key] = job
+        if delay is None:
+            # spread the first run of every job across the interval
+            delay = seconds * random.uniform(0.5, 1.5)
+        self._schedule(job, self.loop.time() + delay)
+        return lambda: self.remove_job(key)
+
+    def set_interval(self, key: Hashable, interval: timedelta):
+        """Change the interval of a job, moving its pending run to match."""
+        if not (job := self._jobs.get(key)):
+            return
+        seconds = interval.total_seconds()
+        if seconds == job.interval:
+            return
+        old, job.interval = job.interval, seconds
+        if job.running:
+            # the next run is scheduled with the new interval when this one finishes
+            return
+        self._schedule(job, max(job.next_run - old + seconds, self.loop.time()))
+
+    def remove_job(self, key: Hashable):
+        self._jobs.pop(key, None)
+        if not self._jobs and self._timer:
+            self._timer.cancel()
+            self._timer = None
+            self._heap = []
+
+    def _schedule(self, job: PollJob, when: float):
+        job.next_run = when
+        self._seq += 1
+        heapq.heappush(self._heap, (when, self._seq, job.key))
+        self._arm()
+
+    def _arm(self):
+        if not self._heap:
+            return
+        when = self._heap[0][0]
+        if self._timer:
+            if self._timer.when() <= when:
+                return
+            self._timer.cancel()
+        self._timer = self.loop.call_at(when, self._wake)
+
+    @callback
+    def _wake(self):
+        self._timer = None
+        now = self.loop.time()
+        while self._heap and self._heap[0][0] <= now:
+            when, _, key = heapq.heappop(self._heap)
+            job = self._jobs.get(key)
+            if not job or job.next_run != when or job.running:
+                continue
+            job.running = True
+            self._create_task(self._execute(job, when))
+        self._arm()
+
+    def _create_task(self, coro):
+        if hasattr(self.hass, 'async_create_background_task'):
+            return self.hass.async_create_background_task(coro, 'tianqi_poll')
+        return self.loop.create_task(coro)
+
+    async def _execute(self, job: PollJob, due: float):
+        try:
+            self.waiting += 1
+            try:
+                await self._semaphore.acquire()
+            finally:
+                self.waiting -= 1
+            self.running += 1
+            try:
+                if self._jobs.get(job.key) is not job:
+                    # removed while it waited for a slot
+                    return
+                await self._throttle(job.host)
+                if self._jobs.get(job.key) is not job:
+                    return
+                job.lag = self.loop.time() - due
+                self.lags.append(job.lag)
+                await job.coordinator.async_refresh()
+            finally:
+                self.running -= 1
+                self._semaphore.release()
+        finally:
+            job.running = False
+            if self._jobs.get(job.key) is job:
+                nxt = due + job.interval * random.uniform(1 - JITTER, 1 + JITTER)
+                now = self.loop.time()
+                while nxt <= now:
+                    nxt += job.interval
+                self._schedule(job, nxt)
+
+    async def _throttle(self, host):
+        if not host or not self.spacing:
+            return
+        now = self.loop.time()
+        start = max(now, self._host_next.get(host, 0))
+        self._host_next[host] = start + self.spacing
+        if start > now:
+            await asyncio.sleep(start - now)
+
+    def stats(self):
+        lags = list(self.lags)
+        return {
+            'jobs': len(self._jobs),
+            'queue_depth': self.waiting,
+            'running': self.running,
+            'lag_avg': round(sum(lags) / len(lags), 3) if lags else 0,
+            'lag_max': round(max(lags), 3) if lags else 0,
+        }
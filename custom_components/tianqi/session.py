@@ -0,0 +1,60 @@
+import logging
+import aiohttp
+
+_LOGGER = logging.getLogger(__name__)
+
+DEFAULT_LIMIT_PER_HOST = 4
+DEFAULT_KEEPALIVE = 60
+DEFAULT_DNS_TTL = 600
+
+
+class SessionPool:
+    """Reference-counted aiohttp sessions shared by all clients of the same domain."""
+
+    def __init__(self):
+        self._sessions = {}  # domain: [session, refs]
+
+    def acquire(self, domain, config=None, headers=None, trace_configs=None) -> aiohttp.ClientSession:
+        config = config or {}
+        if ent := self._sessions.get(domain):
+            if not ent[0].closed:
+                ent[1] += 1
+                return ent[0]
+        connector = aiohttp.TCPConnector(
+            limit_per_host=int(config.get('http_limit_per_host') or DEFAULT_LIMIT_PER_HOST),
+            keepalive_timeout=float(config.get('http_keepalive') or DEFAULT_KEEPALIVE),
+            ttl_dns_cache=int(config.get('http_dns_ttl') or DEFAULT_DNS_TTL),
+            use_dns_cache=True,
+        )
+        session = aiohttp.ClientSession(
+            connector=connector,
+            headers=headers,
+            trace_configs=trace_configs,
+            timeout=aiohttp.ClientTimeout(
+                total=60,
+                connect=30,
+            ),
+        )
+        self._sessions[domain] = [session, 1]
+        _LOGGER.debug('New session for %s', domain)
+        return session
+
+    async def release(self, domain):
+        if not (ent := self._sessions.get(domain)):
+            return
+        ent[1] -= 1
+        if ent[1] > 0:
+            return
+        self._sessions.pop(domain, None)
+        if not ent[0].closed:
+            await ent[0].close()
+        _LOGGER.debug('Closed session for %s', domain)
+
+    async def close(self):
+        for session, _ in self._sessions.values():
+            if not session.closed:
+                await session.close()
+        self._sessions = {}
+
+    def __len__(self):
+        return len(self._sessions)
@@ -0,0 +1,195 @@
+import time
+
+from bisect import bisect_left
+from collections import Counter
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+import aiohttp
+
+# upper bounds of the histogram buckets, milliseconds or bytes
+TIME_BUCKETS = (5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000)
+SIZE_BUCKETS = (1024, 4096, 16384, 65536, 262144, 1048576)
+
+
+class Histogram:
+    """Fixed buckets plus count, sum, min and max; percentiles are bucket upper bounds."""
+
+    __slots__ = ('bounds', 'buckets', 'count', 'total', 'min', 'max')
+
+    def __init__(self, bounds=TIME_BUCKETS):
+        self.bounds = bounds
+        self.buckets = [0] * (len(bounds) + 1)
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value: float):
+        self.buckets[bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def percentile(self, pct: float):
+        if not self.count:
+            return None
+        rank = self.count * pct / 100
+        seen = 0
+        for idx, num in enumerate(self.buckets):
+            seen += num
+            if seen >= rank:
+                return min(self.bounds[idx], self.max) if idx < len(self.bounds) else self.max
+        return self.max
+
+    def as_dict(self):
+        if not self.count:
+            return {'count': 0}
+        return {
+            'count': self.count,
+            'avg': round(self.total / self.count, 1),
+            'min': round(self.min, 1),
+            'max': round(self.max, 1),
+            'p50': self.percentile(50),
+            'p95': self.percentile(95),
+            'buckets': dict(zip([*map(str, self.bounds), 'inf'], self.buckets)),
+        }
+
+
+class EndpointStats:
+    TIMINGS = ('dns', 'connect', 'ttfb', 'total', 'parse')
+
+    def __init__(self):
+        self.timings = {k: Histogram() for k in self.TIMINGS}
+        self.bytes = Histogram(SIZE_BUCKETS)
+        self.requests = 0
+        self.retries = 0
+        self.errors = 0
+        self.statuses = Counter()
+
+    def retried(self):
+        self.retries += 1
+
+    def as_dict(self):
+        return {
+            'requests': self.requests,
+            'retries': self.retries,
+            'errors': self.errors,
+            'statuses': {str(k): v for k, v in self.statuses.items()},
+            'bytes': self.bytes.as_dict(),
+            **{f'{k}_ms': h.as_dict() for k, h in self.timings.items()},
+        }
+
+    def summary(self):
+        """Short form for sensor attributes."""
+        total = self.timings['total']
+        return {
+            'requests': self.requests,
+            'errors': self.errors,
+            'retries': self.retries,
+            'total_ms_p50': total.percentile(50),
+            'total_ms_p95': total.percentile(95),
+            'parse_ms_avg': round(self.timings['parse'].total / self.timings['parse'].count, 2) if self.timings['parse'].count else None,
+        }
+
+
+class RequestStats:
+    """Per-endpoint request histograms of one client.
+
+    Connection timings come from the aiohttp TraceConfig of `trace_config()`, requests opt in by passing
+    `trace_request_ctx={'endpoint': name, 'stats': stats}`; body size, parse time and totals are
+    recorded by the client.
+    """
+
+    def __init__(self):
+        self.endpoints: Dict[str, EndpointStats] = {}
+        self.started = time.time()
+
+    def get(self, endpoint) -> EndpointStats:
+        if not (ent := self.endpoints.get(endpoint)):
+            ent = self.endpoints[endpoint] = EndpointStats()
+        return ent
+
+    def record(self, endpoint, timing, ms: float):
+        self.get(endpoint).timings[timing].add(ms)
+
+    def record_bytes(self, endpoint, size: int):
+        self.get(endpoint).bytes.add(size)
+
+    def as_dict(self, endpoints=None):
+        return {
+            'since': self.started,
+            'endpoints': {
+                name: ent.as_dict()
+                for name, ent in self.endpoints.items()
+                if endpoints is None or name in endpoints
+            },
+        }
+
+
+def trace_config() -> aiohttp.TraceConfig:
+    """Connection timings for sessions shared by clients, each request is counted in the stats of its context."""
+    trace = aiohttp.TraceConfig(trace_config_ctx_factory=_trace_ctx)
+    trace.on_request_start.append(_on_request_start)
+    trace.on_dns_resolvehost_start.append(_on_dns_start)
+    trace.on_dns_resolvehost_end.append(_on_dns_end)
+    trace.on_connection_create_start.append(_on_connect_start)
+    trace.on_connection_create_end.append(_on_connect_end)
+    trace.on_request_end.append(_on_request_end)
+    trace.on_request_exception.append(_on_request_exception)
+    return trace
+
+
+def _trace_ctx(trace_request_ctx=None):
+    return SimpleNamespace(trace_request_ctx=trace_request_ctx, marks={})
+
+
+def _endpoint(ctx) -> Optional[EndpointStats]:
+    req = ctx.trace_request_ctx
+    if isinstance(req, dict) and (name := req.get('endpoint')) and (stats := req.get('stats')):
+        return stats.get(name)
+    return None
+
+
+def _elapsed(ctx, mark):
+    return (time.perf_counter() - ctx.marks.pop(mark)) * 1000
+
+
+async def _on_request_start(session, ctx, params):
+    ctx.marks['request'] = time.perf_counter()
+
+
+async def _on_dns_start(session, ctx, params):
+    ctx.marks['dns'] = time.perf_counter()
+
+
+async def _on_dns_end(session, ctx, params):
+    if (ent := _endpoint(ctx)) and 'dns' in ctx.marks:
+        ent.timings['dns'].add(_elapsed(ctx, 'dns'))
+
+
+async def _on_connect_start(session, ctx, params):
+    ctx.marks['connect'] = time.perf_counter()
+
+
+async def _on_connect_end(session, ctx, params):
+    if (ent := _endpoint(ctx)) and 'connect' in ctx.marks:
+        ent.timings['connect'].add(_elapsed(ctx, 'connect'))
+
+
+async def _on_request_end(session, ctx, params):
+    if not (ent := _endpoint(ctx)):
+        return
+    ent.requests += 1
+    ent.statuses[params.response.status] += 1
+    if 'request' in ctx.marks:
+        # headers received
+        ent.timings['ttfb'].add(_elapsed(ctx, 'request'))
+
+
+async def _on_request_exception(session, ctx, params):
+    if ent := _endpoint(ctx):
+        ent.requests += 1
+        ent.errors += 1
+        ent.statuses[type(params.exception).__name__] += 1
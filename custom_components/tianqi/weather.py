@@ -1,6 +1,6 @@
 from __future__ import annotations
 
-from datetime import datetime, timedelta
+from datetime import timedelta
 
 from homeassistant.components.weather import (
     DOMAIN as ENTITY_DOMAIN,
@@ -19,6 +19,7 @@ from homeassistant.components.weather import (
     ATTR_CONDITION_EXCEPTIONAL,
     ATTR_CONDITION_WINDY,
 )
+from homeassistant.core import callback
 from homeassistant.util import dt
 from homeassistant.const import (
     UnitOfLength,
@@ -37,9 +38,16 @@ except (ModuleNotFoundError, ImportError):
     WeatherEntityFeature = None
 
 from . import DOMAIN, TianqiClient, async_add_setuper, HTTP_REFERER
+from .history import ObserveHistory
+from .records import DailyRow, HourlySeries, wall_datetime, wall_seconds
 
 _LOGGER = logging.getLogger(__name__)
 
+# coordinators whose results change the forecasts
+FORECAST_SOURCES = ('dailies', 'hourlies', 'observe')
+# endpoints the entity always reads, observe and minutely only feed the hourly forecast and caiyun attributes
+WEATHER_SOURCES = {'summary', 'alarms', 'dailies', 'hourlies'}
+
 
 def setuper(add_entities):
     def setup(client: TianqiClient):
@@ -68,7 +76,7 @@ class WeatherEntity(BaseEntity):
 
         self.entity_id = f'{ENTITY_DOMAIN}.{client.station_code}'
         self._attr_name = client.station_name
-        self._attr_unique_id = f'{client.entry_id}-{ENTITY_DOMAIN}'
+        self._attr_unique_id = f'{client.key}-{ENTITY_DOMAIN}'
         self._attr_attribution = None
         self._attr_supported_features = 0
         self._attr_extra_state_attributes = {}
@@ -77,14 +85,63 @@ class WeatherEntity(BaseEntity):
             self._attr_supported_features |= WeatherEntityFeature.FORECAST_DAILY
             self._attr_supported_features |= WeatherEntityFeature.FORECAST_HOURLY
         self.support_caiyun = client.config.get('caiyun')
+        self._daily_memo = None  # (key, forecasts, extra attributes)
+        self._hourly_memo = None
+        self._notified = {}  # forecast type: list last announced to subscribers
+        self._subscriptions = set()  # forecast types with websocket subscribers
 
     async def async_added_to_hass(self):
         self.added = True
         self.client.entities[ENTITY_DOMAIN] = self
+        self.update_consumer()
+        for coord in self.client.coordinators:
+            if coord.name in FORECAST_SOURCES:
+                self.async_on_remove(coord.async_add_listener(self._forecast_source_updated))
 
         await super().async_added_to_hass()
         await self.update_from_client()
 
+    async def async_will_remove_from_hass(self):
+        self.client.remove_consumer(ENTITY_DOMAIN)
+        await super().async_will_remove_from_hass()
+
+    @callback
+    def update_consumer(self):
+        """Declare the endpoints the entity currently reads to the client."""
+        endpoints = set(WEATHER_SOURCES)
+        if self.support_caiyun:
+            endpoints |= {'observe', 'minutely'}
+        elif 'hourly' in self._subscriptions or not hasattr(BaseEntity, '_async_subscription_started'):
+            # older hass can't tell whether the hourly forecast is used
+            endpoints.add('observe')
+        self.client.set_consumer(ENTITY_DOMAIN, endpoints)
+
+    @callback
+    def _async_subscription_started(self, forecast_type):
+        self._subscriptions.add(forecast_type)
+        self.update_consumer()
+
+    @callback
+    def _async_subscription_ended(self, forecast_type):
+        self._subscriptions.discard(forecast_type)
+        self.update_consumer()
+
+    @callback
+    def _forecast_source_updated(self):
+        self.hass.async_create_task(self.update_from_client())
+
+    async def notify_forecasts(self, **forecasts):
+        """Tell forecast subscribers about the types whose list changed since the last notice."""
+        changed = []
+        for typ, lst in forecasts.items():
+            last = self._notified.get(typ)
+            if lst is last or lst == last:
+                continue
+            self._notified[typ] = lst
+            changed.append(typ)
+        if changed and hasattr(self, 'async_update_listeners'):
+            await self.async_update_listeners(changed)
+
     async def update_from_client(self):
         dat = self.client.data
         dataZS = dat.get('dataZS') or {}
@@ -110,13 +167,16 @@ class WeatherEntity(BaseEntity):
             'aqi': dataSK.get('aqi'),
             'limit_number': dataSK.get('limitnumber'),
             'area_id': self.client.area_id,
-            'forecast_minutely': self.client.data.get('minutely', {}).get('msg'),
             'forecast_hourly': dataZS.get('ct_des_s'),
             'forecast_keypoint': dataZS.get('ys_des_s'),
             'forecast_alert': {'status': '', 'content': []},
             'updated_time': dataSK.get('time'),
         }
 
+        if 'minutely' in self.client.active_endpoints:
+            # only while caiyun or the minutely sensor keeps it polled, it would freeze otherwise
+            self._attr_extra_state_attributes['forecast_minutely'] = (dat.get('minutely') or {}).get('msg')
+
         if alarms := dat.get('alarms') or []:
             self._attr_extra_state_attributes['forecast_alert'] = {'status': 'ok', 'content': [
                 {
@@ -142,7 +202,7 @@ class WeatherEntity(BaseEntity):
         if indexes:
             self._attr_extra_state_attributes['indexes'] = indexes
 
-        forecasts = await self.async_forecast_daily()
+        daily = forecasts = await self.async_forecast_daily()
         if hasattr(self, '_attr_forecast'):
             self._attr_forecast = forecasts
         elif self.support_caiyun:
@@ -150,19 +210,31 @@ class WeatherEntity(BaseEntity):
                 forecasts = self._convert_forecast(forecasts)
             self._attr_extra_state_attributes['forecast'] = forecasts
 
-        await self.async_forecast_hourly()
+        hourly = await self.async_forecast_hourly()
         self.async_write_ha_state()
+        await self.notify_forecasts(daily=daily, hourly=hourly)
 
     async def async_forecast_daily(self) -> list[Forecast] | None:
         """Return the daily forecast in native units.
         Only implement this method if `WeatherEntityFeature.FORECAST_DAILY` is set
         """
-        now = dt.now()
-        lst = []
         if 'dailies' not in self.client.data:
             await self.client.update_dailies()
-        for item in self.client.data.get('dailies', []):
-            code = f'd{item.get("fa")}'
+        now = dt.now()
+        dailies = self.client.data.get('dailies', [])
+        rain = (self.client.data.get('dataSK') or {}).get('rain')
+        key = (dailies, rain, now.date(), now.tzinfo)
+        if not memo_hit(self._daily_memo, key):
+            self._daily_memo = (key, *self._build_daily(dailies, rain, now))
+        _, lst, extra = self._daily_memo
+        self._attr_extra_state_attributes.update(extra)
+        return lst
+
+    def _build_daily(self, dailies: list[DailyRow], precipitation, now):
+        lst = []
+        extra = {}
+        for item in dailies:
+            code = f'd{item.code:02d}'
             if code not in ConditionCodes.__members__:
                 continue
             row = {
@@ -170,118 +242,112 @@ class WeatherEntity(BaseEntity):
                 'skycon': ConditionCodes[code].value[1],
                 'native_precipitation': ConditionCodes[code].value[2],
             }
-            dfi = item.get('fi', '')
-            today = dfi == now.strftime('%m/%d').replace('/0', '/').lstrip('0')
+            today = (item.month, item.day) == (now.month, now.day)
             try:
-                day = datetime.strptime(dfi, '%m/%d')
                 tim = now.replace(
-                    month=day.month, day=day.day, hour=0,
+                    month=item.month, day=item.day, hour=0,
                     minute=0, second=0, microsecond=0,
                 )
                 row['datetime'] = tim
-            except (TypeError, ValueError):
+            except ValueError:
                 continue
             try:
-                precipitation = self.client.data.get('dataSK', {}).get('rain')
-                if precipitation and tim.date() == dt.now().date():
+                if precipitation and today:
                     row['native_precipitation'] = float(precipitation)
             except (TypeError, ValueError):
                 pass
-            try:
-                row['humidity'] = float(item.get('fn'))
-            except (TypeError, ValueError):
-                pass
-            try:
-                row['native_temperature'] = val = float(item.get('fc'))
+            if (val := item.value('humidity')) is not None:
+                row['humidity'] = val
+            if (val := item.value('temperature')) is not None:
+                row['native_temperature'] = val
                 if today:
-                    self._attr_extra_state_attributes['temphigh'] = val
-            except (TypeError, ValueError):
-                pass
-            try:
-                row['native_templow'] = val = float(item.get('fd'))
+                    extra['temphigh'] = val
+            if (val := item.value('templow')) is not None:
+                row['native_templow'] = val
                 if today:
-                    self._attr_extra_state_attributes['templow'] = val
-            except (TypeError, ValueError):
-                pass
-            row['wind_bearing'] = item.get('fe')
+                    extra['templow'] = val
+            row['wind_bearing'] = item.wind_bearing
             lst.append(row)
-        return lst
+        return lst, extra
 
     async def async_forecast_hourly(self) -> list[Forecast] | None:
         """Return the hourly forecast in native units.
         Only implement this method if `WeatherEntityFeature.FORECAST_HOURLY` is set
         """
-        if self.support_caiyun:
-            self._attr_extra_state_attributes.setdefault('hourly_temperature', [])
-            self._attr_extra_state_attributes.setdefault('hourly_skycon', [])
-            self._attr_extra_state_attributes.setdefault('hourly_cloudrate', [])
-            self._attr_extra_state_attributes.setdefault('hourly_precipitation', [])
-        lst = []
         if 'hourlies' not in self.client.data:
             await self.client.update_hourlies()
-        for item in self.client.data.get('hourlies', []):
+        series = self.client.data.get('hourlies') or HourlySeries()
+        history = self.client.history
+        now = dt.now()
+        start = series.index(wall_seconds(now - timedelta(hours=1.5)))
+        key = (series, history.version, start, now.tzinfo)
+        if not memo_hit(self._hourly_memo, key):
+            self._hourly_memo = (key, *self._build_hourly(series, history, start, now.tzinfo))
+        _, lst, extra = self._hourly_memo
+        if self.support_caiyun:
+            self._attr_extra_state_attributes.update(extra)
+        return lst
+
+    def _build_hourly(self, series: HourlySeries, history: ObserveHistory, start, tz):
+        lst = []
+        extra = {
+            'hourly_temperature': [],
+            'hourly_skycon': [],
+            'hourly_cloudrate': [],
+            'hourly_precipitation': [],
+        }
+        for item in series.rows(start):
             if len(lst) > 48:
                 break
-            code = f'd{item.get("ja")}'
+            code = f'd{item.code:02d}'
             if code not in ConditionCodes.__members__:
                 continue
+            tim = wall_datetime(item.time, tz)
             row = {
                 'condition': ConditionCodes[code].value[0],
                 'skycon': ConditionCodes[code].value[1],
                 'native_precipitation': ConditionCodes[code].value[2],
+                'datetime': tim,
             }
-            ymd = item.get('jf', '')
-            observe = self.client.data.get('observe', {}).get(ymd) or {}
+            observe = history.get(item.time) if item.time <= (history.last_time or 0) else None
             if observe:
-                row['native_precipitation'] = observe.get('rain')
-            try:
-                day = datetime.strptime(ymd, '%Y%m%d%H%M')
-                tim = dt.now().replace(
-                    month=day.month, day=day.day, hour=day.hour,
-                    minute=0, second=0, microsecond=0,
-                )
-                row['datetime'] = tim
-            except (TypeError, ValueError):
-                continue
-            if dt.now() - tim > timedelta(hours=1.5):
-                continue
-            try:
-                row['humidity'] = float(item.get('je'))
-            except (TypeError, ValueError):
-                pass
-            try:
-                row['native_temperature'] = float(item.get('jb'))
-            except (TypeError, ValueError):
-                pass
-            try:
-                row['native_pressure'] = float(item.get('jj'))
-            except (TypeError, ValueError):
-                pass
-            try:
-                row['native_wind_speed'] = float(item.get('jg'))
-            except (TypeError, ValueError):
-                pass
-            row['wind_bearing'] = observe.get('wind')
+                row['native_precipitation'] = observe.rain
+            if item.humidity is not None:
+                row['humidity'] = item.humidity
+            if item.temperature is not None:
+                row['native_temperature'] = item.temperature
+            if item.pressure is not None:
+                row['native_pressure'] = item.pressure
+            if item.wind_speed is not None:
+                row['native_wind_speed'] = item.wind_speed
+            row['wind_bearing'] = observe.wind if observe else None
             lst.append(row)
 
-            if self.support_caiyun:
-                self._attr_extra_state_attributes['hourly_temperature'].append({
-                    'datetime': tim,
-                    'value': row.get('native_temperature'),
-                })
-                self._attr_extra_state_attributes['hourly_precipitation'].append({
-                    'datetime': tim,
-                    'value': row.get('native_precipitation'),
-                })
-                self._attr_extra_state_attributes['hourly_skycon'].append({
-                    'datetime': tim,
-                    'value': ConditionCodes[code].value[1],
-                })
-                self._attr_extra_state_attributes['hourly_cloudrate'].append({
-                    'datetime': tim,
-                    'value': ConditionCodes[code].value[3] / 100,
-                })
-        return lst
+            extra['hourly_temperature'].append({
+                'datetime': tim,
+                'value': row.get('native_temperature'),
+            })
+            extra['hourly_precipitation'].append({
+                'datetime': tim,
+                'value': row.get('native_precipitation'),
+            })
+            extra['hourly_skycon'].append({
+                'datetime': tim,
+                'value': ConditionCodes[code].value[1],
+            })
+            extra['hourly_cloudrate'].append({
+                'datetime': tim,
+                'value': ConditionCodes[code].value[3] / 100,
+            })
+        return lst, extra
+
+
+def memo_hit(memo, key: tuple):
+    """Whether the memo was built from the same sources, the same objects or equal values."""
+    if not memo or len(memo[0]) != len(key):
+        return False
+    return all(a is b or a == b for a, b in zip(memo[0], key))
+
 
 class ConditionCodes(enum.Enum):
     # [state, skycon, precipitation(mm/h), cloud_coverage(%), name]
@@ -0,0 +1,63 @@
+import asyncio
+import json
+
+import pytest
+
+from custom_components.tianqi.extractor import JsVars
+
+FC = JsVars({'fc': r'var fc\s*=\s*'})
+
+
+async def _chunks(body, size):
+    for i in range(0, len(body), size):
+        yield body[i:i + size]
+
+
+def extract_chunked(spec, body, size):
+    return asyncio.run(spec.extract_stream(_chunks(body, size))).results
+
+
+@pytest.mark.parametrize('tail', [b',x=1;', b']', b'}', b' , y = {"b": 2};', b'\n]}'])
+def test_object_followed_by_closer(tail):
+    body = b'var fc = {"a": {"b": [1, 2]}, "c": []}' + tail
+    assert FC.extract(body) == {'fc': {'a': {'b': [1, 2]}, 'c': []}}
+
+
+@pytest.mark.parametrize('text', ['}', '};', '{', ']}', '"}', 'a\\', '\\"}{', '天气}'])
+def test_brackets_inside_strings(text):
+    value = {'w': text, 'n': [{'x': text}]}
+    body = f'var fc = {json.dumps(value, ensure_ascii=False)};var b = 1;'.encode()
+    assert FC.extract(body) == {'fc': value}
+
+
+@pytest.mark.parametrize('size', [1, 2, 3, 7, 64])
+def test_split_across_chunks(size):
+    body = 'var x = 1; var fc = {"a": "}\\"{", "b": [{"c": "天"}, "]"]},z=[1];'.encode()
+    assert extract_chunked(FC, body, size) == {'fc': {'a': '}"{', 'b': [{'c': '天'}, ']']}}
+
+
+def test_several_variables():
+    spec = JsVars({'sk': r'dataSK\s*=\s*', 'zs': r'dataZS\s*=\s*'})
+    body = b'var dataZS = {"a": "}"}, dataSK = {"b": {}};'
+    assert extract_chunked(spec, body, 5) == {'zs': {'a': '}'}, 'sk': {'b': {}}}
+
+
+def test_unreadable_object_is_skipped():
+    body = b'var fc = {a: 1}; var fc = {"a": 2};'
+    assert FC.extract(body) == {'fc': {'a': 2}}
+
+
+def test_unchanged_page_is_not_scanned():
+    body = b'<p>' * 50 + b'var fc = {"a": "}"};' + b'<p>' * 500
+
+    async def run():
+        first = await FC.extract_stream(_chunks(body, 64), '')
+        again = await FC.extract_stream(_chunks(body, 100), first.digest)
+        changed = await FC.extract_stream(_chunks(body.replace(b'"}"', b'"]"'), 64), first.digest)
+        return first, again, changed
+
+    first, again, changed = asyncio.run(run())
+    assert first.results == {'fc': {'a': '}'}} and not first.unchanged
+    assert again.unchanged and again.results == {} and again.parse_time == 0
+    assert again.bytes_read < len(body)
+    assert changed.results == {'fc': {'a': ']'}} and changed.digest != first.digest
@@ -0,0 +1,118 @@
+"""Responses of the update services keep the shape they had before the records, compared with the baseline parsing."""
+import asyncio
+import json
+import re
+import tempfile
+
+from datetime import datetime, timedelta
+
+import pytest
+
+from homeassistant.config_entries import ConfigEntries
+from homeassistant.core import HomeAssistant
+
+from benchmarks import pages
+from custom_components.tianqi import TianqiClient
+from custom_components.tianqi.cache import EndpointResult
+from custom_components.tianqi.records import StationInfo
+
+PAGES = {
+    'summary': pages.summary_page(),
+    'alarms': pages.alarms_page(),
+    'dailies': pages.dailies_page(),
+    'hourlies': pages.hourlies_page(),
+    'observe': pages.observe_page(),
+}
+MINUTELY = pages.minutely_json()
+
+
+def _var(pattern, name):
+    match = re.search(pattern, PAGES[name].decode(), re.DOTALL)
+    return json.loads(match.group(1)) or {}
+
+
+def baseline_observe():
+    fmt = '%Y%m%d%H%M'
+    dat = {}
+    rdt = _var(r'observe24h_data\s*=\s*({.*?})\s*;', 'observe').get('od') or {}
+    lst = rdt.get('od2') or []
+    lst.reverse()
+    stm = datetime.strptime(rdt.get('od0', ''), fmt)
+    for v in lst:
+        tim = stm.replace(hour=int(v.get('od21', 0)))
+        if tim < stm:
+            tim = tim + timedelta(days=1)
+        stm = tim
+        dat[tim.strftime(fmt)] = {
+            **v,
+            'aqi': v.get('od28'),
+            'temp': float(v.get('od22')),
+            'humi': float(v.get('od27')),
+            'rain': float(v.get('od26') or 0),
+            'wind': v.get('od24'),
+            'wind_level': float(v.get('od25') or 0),
+            'wind_angel': float(v.get('od23') or 0),
+        }
+    return dat
+
+
+# service: what it added to the data before the records, parsed as it was then
+BASELINE = {
+    'summary': lambda: {
+        'dataSK': _var(r'dataSK\s*=\s*({.*?})\s*;', 'summary'),
+        'dataZS': _var(r'dataZS\s*=\s*({.*?})\s*;', 'summary').get('zs') or {},
+    },
+    'alarms': lambda: {'alarms': _var(r'var alarmDZ\w*\s*=\s*({.*})', 'alarms').get('w') or []},
+    'dailies': lambda: {'dailies': _var(r'fc\s*=\s*({.*})', 'dailies').get('f') or []},
+    'hourlies': lambda: {'hourlies': _var(r'fc180\s*=\s*({.*})', 'hourlies').get('jh') or []},
+    'minutely': lambda: {'minutely': json.loads(MINUTELY)},
+    'observe': baseline_observe,
+}
+
+
+def assert_shape(value, base, path='response'):
+    """Same containers and keys as the baseline, the keys the records do not keep may be missing."""
+    if isinstance(base, dict):
+        assert isinstance(value, dict), path
+        assert value.keys() <= base.keys(), (path, value.keys() - base.keys())
+        for key, val in value.items():
+            assert_shape(val, base[key], f'{path}.{key}')
+    elif isinstance(base, list):
+        assert isinstance(value, list), path
+        assert len(value) == len(base), path
+        for i, (val, ent) in enumerate(zip(value, base)):
+            assert_shape(val, ent, f'{path}[{i}]')
+    elif isinstance(base, str) and value != base:
+        # numbers come back from floats, '21.0' as '21'
+        assert isinstance(value, str) and float(value) == float(base), (path, value, base)
+    else:
+        assert value == base, (path, value, base)
+
+
+async def update(service):
+    async def fetch_vars(endpoint, area_id, api, spec):
+        return EndpointResult(), spec.extract(PAGES[endpoint])
+
+    async def fetch_json(endpoint, area_id, api, params=None):
+        return EndpointResult(), {None: json.loads(MINUTELY)}
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.config_entries = ConfigEntries(hass, {})
+        client = TianqiClient(hass, {'domain': 'weather.invalid', 'entry_id': 'services'})
+        client.station = StationInfo(json.loads(pages.station_json())['data']['station'])
+        client.fetch_vars = fetch_vars
+        client.fetch_json = fetch_json
+        try:
+            return await getattr(client, f'update_{service}')()
+        finally:
+            await client.unload()
+
+
+@pytest.mark.parametrize('service', list(BASELINE))
+def test_update_service_response(service):
+    response = json.loads(json.dumps(asyncio.run(update(service))))
+    base = BASELINE[service]()
+    if service != 'observe':
+        response = {key: response[key] for key in base}
+    assert_shape(response, base)
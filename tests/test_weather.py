@@ -0,0 +1,53 @@
+import asyncio
+import json
+import tempfile
+
+from homeassistant.config_entries import ConfigEntries
+from homeassistant.core import HomeAssistant
+
+from benchmarks import pages
+from custom_components.tianqi import TianqiClient
+from custom_components.tianqi.cache import EndpointResult
+from custom_components.tianqi.records import DailyRow, StationInfo
+from custom_components.tianqi.weather import WeatherEntity
+
+PAGES = {
+    'summary': pages.summary_page(),
+    'dailies': pages.dailies_page(),
+    'hourlies': pages.hourlies_page(),
+}
+
+
+async def subscribed_updates():
+    """Daily forecasts pushed to a subscriber over three updates, the last one with a warmer first day."""
+    async def fetch_vars(endpoint, area_id, api, spec):
+        return EndpointResult(), spec.extract(PAGES[endpoint])
+
+    with tempfile.TemporaryDirectory() as config_dir:
+        hass = HomeAssistant(config_dir)
+        hass.config_entries = ConfigEntries(hass, {})
+        client = TianqiClient(hass, {'domain': 'weather.invalid', 'entry_id': 'weather'})
+        client.station = StationInfo(json.loads(pages.station_json())['data']['station'])
+        client.fetch_vars = fetch_vars
+        try:
+            for name in PAGES:
+                await getattr(client, f'update_{name}')()
+            entity = WeatherEntity(client)
+            pushed = []
+            unsubscribe = entity.async_subscribe_forecast('daily', pushed.append)
+            await entity.update_from_client()
+            await entity.update_from_client()
+            first, *rest = client.data['dailies']
+            client.data['dailies'] = [DailyRow(first.month, first.day, first.code, first.temperature + 5), *rest]
+            await entity.update_from_client()
+            unsubscribe()
+            return pushed, first.temperature
+        finally:
+            await client.unload()
+
+
+def test_forecast_subscribers_are_notified_of_changes_only():
+    pushed, temperature = asyncio.run(subscribed_updates())
+    assert len(pushed) == 2
+    assert pushed[0][0]['temperature'] == temperature
+    assert pushed[1][0]['temperature'] == temperature + 5